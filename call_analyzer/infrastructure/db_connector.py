@@ -1,11 +1,18 @@
 import logging
-from typing import Optional
+from importlib.util import find_spec
+from typing import Dict, Iterator, Optional
 
 import pandas as pd
 from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import mysql
 from sqlalchemy.engine import Engine
 from sqlalchemy.pool import QueuePool
 
+try:
+    import connectorx as cx
+except ImportError:  # optional dependency: pip install call-analyzer[fast]
+    cx = None
+
 logger = logging.getLogger(__name__)
 
 # Module-level engine cache keyed by connection URL — shared across CDRAnalyzerApp instances
@@ -15,14 +22,40 @@ _engine_cache: dict = {}
 class DatabaseConnector:
     """Gère la connexion à la base de données et l'exécution des requêtes."""
 
+    # Rows fetched per round-trip when streaming results from the server
+    CHUNK_SIZE = 50_000
+
+    # Connections are opened lazily, so a large pool costs nothing until it is used.
+    # MariaDB/MySQL max_connections must be >= pool_size (per process sharing the engine),
+    # otherwise the extra checkouts fail instead of queueing.
+    POOL_SIZE = 25
+    MAX_OVERFLOW = 0
+
+    # Low-cardinality CDR columns stored as category: one copy of each string plus int codes
+    CATEGORICAL_COLUMNS = ('disposition', 'context', 'lastapp', 'accountcode')
+
     def __init__(self, user: str, password: str, database_name: str, host: str, port: str,
-                 charset: Optional[str] = None):
+                 charset: Optional[str] = None, fast_path: bool = False,
+                 pool_size: int = POOL_SIZE, max_overflow: int = MAX_OVERFLOW,
+                 dtype_backend: Optional[str] = None):
         self.user = user
         self.password = password
         self.database_name = database_name
         self.host = host
         self.port = port
         self.charset = charset
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        # 'pyarrow': string columns kept as contiguous Arrow buffers instead of object arrays.
+        # Checked here rather than failing in the middle of the first chunked read.
+        if dtype_backend == 'pyarrow' and find_spec('pyarrow') is None:
+            raise ImportError("dtype_backend='pyarrow' nécessite pyarrow (pip install call-analyzer[parquet]).")
+        self.dtype_backend = dtype_backend
+        # SELECTs go through connectorx (Arrow, no per-row Python unpacking) when available;
+        # the SQLAlchemy engine is kept for everything else.
+        self.fast_path = fast_path and cx is not None
+        if fast_path and cx is None:
+            logger.warning("connectorx n'est pas installé : lecture via SQLAlchemy.")
         self.engine = self._get_or_create_engine()
 
     def _build_url(self) -> str:
@@ -34,7 +67,8 @@ class DatabaseConnector:
     def _get_or_create_engine(self) -> Engine:
         # Cache key excludes password for safety; the full URL is used as the actual key
         url = self._build_url()
-        cache_key = (self.host, self.port, self.database_name, self.user, self.charset)
+        cache_key = (self.host, self.port, self.database_name, self.user, self.charset,
+                     self.pool_size, self.max_overflow)
         if cache_key not in _engine_cache:
             try:
                 _engine_cache[cache_key] = create_engine(
@@ -42,8 +76,8 @@ class DatabaseConnector:
                     echo=False,
                     pool_pre_ping=True,
                     poolclass=QueuePool,
-                    pool_size=3,
-                    max_overflow=2,
+                    pool_size=self.pool_size,
+                    max_overflow=self.max_overflow,
                     pool_recycle=1800,
                 )
                 logger.debug(f"Nouveau moteur SQLAlchemy créé pour {self.host}:{self.port}/{self.database_name}")
@@ -52,14 +86,57 @@ class DatabaseConnector:
                 raise
         return _engine_cache[cache_key]
 
-    def execute_query(self, query: str) -> pd.DataFrame:
+    def iter_query(self, query: str, params: Optional[Dict] = None,
+                   chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """Renvoie le résultat d'une requête par blocs de `chunksize` lignes.
+
+        stream_results active un curseur côté serveur (SSCursor pour pymysql) : le driver
+        ne met plus l'intégralité du résultat en mémoire avant de construire les DataFrames.
+        """
         try:
-            with self.engine.connect() as conn:
-                return pd.read_sql(text(query), conn)
+            with self.engine.connect().execution_options(stream_results=True, max_row_buffer=chunksize) as conn:
+                # pandas rejects dtype_backend=None, so it is only passed when configured
+                backend = {'dtype_backend': self.dtype_backend} if self.dtype_backend else {}
+                yield from pd.read_sql_query(text(query), conn, params=params, chunksize=chunksize, **backend)
         except Exception as e:
             logger.error(f"Erreur lors de l'exécution de la requête : {e}")
             raise
 
+    def _read_with_connectorx(self, query: str, params: Optional[Dict] = None) -> pd.DataFrame:
+        url = f'mysql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database_name}'
+        if params:
+            # connectorx has no parameter binding: let SQLAlchemy render escaped literals
+            query = str(text(query).bindparams(**params).compile(
+                dialect=mysql.dialect(paramstyle='named'), compile_kwargs={'literal_binds': True}))
+        try:
+            if self.dtype_backend == 'pyarrow':
+                # Arrow table straight into Arrow-backed columns, no numpy round-trip
+                table = cx.read_sql(url, query, return_type='arrow', protocol='binary')
+                return table.to_pandas(types_mapper=pd.ArrowDtype)
+            df = cx.read_sql(url, query, return_type='pandas', protocol='binary')
+            return df.convert_dtypes(dtype_backend=self.dtype_backend) if self.dtype_backend else df
+        except Exception as e:
+            logger.error(f"Erreur lors de l'exécution de la requête : {e}")
+            raise
+
+    @staticmethod
+    def _to_categorical(df: pd.DataFrame) -> pd.DataFrame:
+        for col in DatabaseConnector.CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df
+
+    def execute_query(self, query: str, params: Optional[Dict] = None,
+                      chunksize: int = CHUNK_SIZE) -> pd.DataFrame:
+        if self.fast_path:
+            return self._to_categorical(self._read_with_connectorx(query, params))
+        chunks = list(self.iter_query(query, params, chunksize))
+        if not chunks:
+            return pd.DataFrame()
+        # Cast after concat: chunks with different categories would fall back to object
+        df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+        return self._to_categorical(df)
+
     def has_column(self, table: str, column: str) -> bool:
         """Returns True if the given column exists in table (MySQL SHOW COLUMNS)."""
         try:
@@ -1,17 +1,49 @@
 import logging
 import os
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
+import xlsxwriter
 
 from ..services.statistics import StatisticsGenerator
 
 logger = logging.getLogger(__name__)
 
+# Mirrors the header style pandas applies with to_excel
+_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+# Durations are written as Excel time values (fraction of a day) and rendered by Excel
+_DURATION_FORMAT = {'num_format': '[h]:mm:ss'}
+_DURATION_COLUMNS = frozenset(('Durée', 'Durée Totale', 'Durée Moyenne'))
+
+# Fixed widths for the "Appels" sheet: the content shape is known, no need to scan every cell
+_CALLS_COLUMN_WIDTHS = {
+    'Date et heure': 20,
+    'Source': 15,
+    'Nom appelant': 25,
+    'Destination': 15,
+    'Nom destination': 25,
+    'Durée': 10,
+    'Statut': 12,
+    'Type': 10,
+    "Chemin d'appel": 50,
+    'Renvoi depuis': 15,
+    'Renvoi vers': 15,
+    'Transfert depuis': 17,
+    'Transfert vers': 15,
+    'DID': 15,
+}
+
 
 class ExcelExporter:
     """Exporte les données et statistiques vers des fichiers Excel."""
 
+    # Above this many calls the list is split across several workbooks (Excel caps a sheet at 1,048,576 rows)
+    MAX_ROWS_PER_FILE = 500_000
+    # Data rows a sheet can hold below the header; xlsxwriter silently drops the rows past it
+    EXCEL_MAX_DATA_ROWS = 1_048_575
+
     @staticmethod
     def format_duration(seconds: int) -> str:
         if pd.isna(seconds) or seconds == 0:
@@ -21,38 +53,63 @@ class ExcelExporter:
         return f"{h:02d}:{m:02d}:{s:02d}"
 
     @staticmethod
-    def _format_duration_series(series: pd.Series) -> pd.Series:
-        """Vectorised version of format_duration for a whole column."""
-        sec = series.fillna(0).astype(int)
-        h = sec // 3600
-        m = (sec % 3600) // 60
-        s = sec % 60
-        return h.map('{:02d}'.format) + ':' + m.map('{:02d}'.format) + ':' + s.map('{:02d}'.format)
+    def excel_duration_series(series: pd.Series) -> pd.Series:
+        """Secondes → fraction de jour, pour une cellule au format [h]:mm:ss."""
+        # Whole seconds, like format_duration
+        return series.fillna(0).astype('int64') / 86400
 
     @staticmethod
     def _auto_column_widths(worksheet, df: pd.DataFrame):
         """Ajuste les largeurs de colonnes en une passe vectorisée."""
-        for i, col in enumerate(df.columns):
-            # str.len() is vectorised; max of header vs data
-            max_len = max(
-                df[col].astype(str).str.len().max(),
-                len(str(col))
-            ) + 2
-            worksheet.column_dimensions[chr(65 + i)].width = min(int(max_len), 50)
+        # Longest rendered value per column vs header length, capped at 50
+        data_lens = df.astype(str).apply(lambda col: col.str.len().max()).fillna(0).to_numpy()
+        header_lens = [len(str(col)) for col in df.columns]
+        widths = np.minimum(np.maximum(data_lens, header_lens) + 2, 50)
+        for i, width in enumerate(widths):
+            # Indexed by column number, so sheets wider than A-Z keep their widths
+            worksheet.set_column(i, i, int(width))
 
     @staticmethod
-    def export_calls_to_excel(df: pd.DataFrame, filename: str,
-                               extensions_dict: Optional[Dict[str, str]] = None) -> str:
-        if df.empty:
-            logger.warning("Aucune donnée à exporter vers Excel.")
-            return ""
+    def _write_rows(workbook, sheet_name: str, df: pd.DataFrame,
+                    widths: Optional[Dict[str, int]] = None, header_format=None,
+                    duration_format=None) -> None:
+        """Écrit un DataFrame ligne par ligne, dans l'ordre exigé par constant_memory."""
+        worksheet = workbook.add_worksheet(sheet_name)
+        # Widths must be known before the first row is flushed to disk
+        if widths is None:
+            ExcelExporter._auto_column_widths(worksheet, df)
+        else:
+            for i, col in enumerate(df.columns):
+                worksheet.set_column(i, i, widths.get(col, len(str(col)) + 2))
+        # Unformatted numbers inherit the column format, so rows can still go through write_row
+        for i, col in enumerate(df.columns):
+            if col in _DURATION_COLUMNS:
+                if duration_format is None:
+                    duration_format = workbook.add_format(_DURATION_FORMAT)
+                width = widths[col] if widths and col in widths else max(len(str(col)) + 2, 10)
+                worksheet.set_column(i, i, width, duration_format)
+        if header_format is None:
+            header_format = workbook.add_format(_HEADER_FORMAT)
+        worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
 
-        export_df = df.copy()
-        export_df['duree'] = ExcelExporter._format_duration_series(export_df['billsec'])
+        # NaN/NaT have no xlsx representation: write them as blank cells like pandas does
+        columns = []
+        for i in range(df.shape[1]):
+            col = df.iloc[:, i]
+            if col.hasnans:
+                col = col.astype(object).where(col.notna(), None)
+            columns.append(col)
+        for row_idx, row in enumerate(zip(*columns), start=1):
+            worksheet.write_row(row_idx, 0, row)
 
+    @staticmethod
+    def _build_calls_export_df(df: pd.DataFrame, durations: pd.Series,
+                               extensions_dict: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """Colonnes exportées pour la liste des appels, communes aux formats xlsx et parquet."""
+        # Only the derived columns are computed; everything else is taken as-is from df
+        derived = {'duree': durations}
         if extensions_dict:
-            export_df['src_name'] = export_df['src'].map(extensions_dict)
-            export_df['dst_name'] = export_df['dst'].map(extensions_dict)
+            derived['dst_name'] = df['dst'].map(extensions_dict)
 
         columns_mapping = {
             'call_date': 'Date et heure',
@@ -71,21 +128,93 @@ class ExcelExporter:
             'did': 'DID',
         }
 
-        export_columns = [c for c in columns_mapping if c in export_df.columns]
-        export_df = export_df[export_columns].rename(columns={c: columns_mapping[c] for c in export_columns})
+        # Assemble the output from the selected columns instead of deep-copying the whole frame
+        return pd.DataFrame({
+            label: derived[col] if col in derived else df[col]
+            for col, label in columns_mapping.items()
+            if col in derived or col in df.columns
+        }, copy=False)
+
+    @staticmethod
+    def export_calls_to_excel(df: pd.DataFrame, filename: str,
+                               extensions_dict: Optional[Dict[str, str]] = None) -> str:
+        if df.empty:
+            logger.warning("Aucune donnée à exporter vers Excel.")
+            return ""
+
+        export_df = ExcelExporter._build_calls_export_df(
+            df, ExcelExporter.excel_duration_series(df['billsec']), extensions_dict)
 
         os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else '.', exist_ok=True)
 
         try:
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                export_df.to_excel(writer, sheet_name='Appels', index=False)
-                ExcelExporter._auto_column_widths(writer.sheets['Appels'], export_df)
+            # constant_memory streams each row to a temp file instead of keeping every cell in RAM.
+            # pandas' to_excel writes column by column, which constant_memory cannot handle,
+            # so rows are written directly through xlsxwriter.
+            with xlsxwriter.Workbook(filename, {
+                'constant_memory': True,
+                'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            }) as workbook:
+                ExcelExporter._write_rows(workbook, 'Appels', export_df, _CALLS_COLUMN_WIDTHS)
             logger.info(f"Données exportées avec succès vers {filename}")
             return filename
         except Exception as e:
             logger.error(f"Erreur lors de l'export vers Excel: {e}")
             return ""
 
+    @staticmethod
+    def export_calls_to_excel_files(df: pd.DataFrame, filename: str,
+                                    extensions_dict: Optional[Dict[str, str]] = None,
+                                    max_rows: Optional[int] = None) -> List[str]:
+        """Exporte la liste des appels, découpée en fichiers de max_rows lignes au plus.
+
+        Un seul fichier garde le nom demandé ; sinon les parties sont suffixées _1, _2...
+        max_rows vaut MAX_ROWS_PER_FILE par défaut et doit rester entre 1 et EXCEL_MAX_DATA_ROWS.
+        """
+        if max_rows is None:
+            max_rows = ExcelExporter.MAX_ROWS_PER_FILE
+        if not 1 <= max_rows <= ExcelExporter.EXCEL_MAX_DATA_ROWS:
+            raise ValueError(
+                f"Nombre de lignes par fichier Excel invalide: {max_rows} "
+                f"(attendu entre 1 et {ExcelExporter.EXCEL_MAX_DATA_ROWS})")
+        if len(df) <= max_rows:
+            return [ExcelExporter.export_calls_to_excel(df, filename, extensions_dict)]
+
+        root, ext = os.path.splitext(filename)
+        return [
+            ExcelExporter.export_calls_to_excel(
+                df.iloc[start:start + max_rows], f"{root}_{part}{ext}", extensions_dict)
+            for part, start in enumerate(range(0, len(df), max_rows), start=1)
+        ]
+
+    @staticmethod
+    def export_calls_to_parquet(df: pd.DataFrame, filename: str,
+                                extensions_dict: Optional[Dict[str, str]] = None) -> str:
+        """Exporte la liste des appels en Parquet (zstd), sans la limite de lignes d'Excel."""
+        if df.empty:
+            logger.warning("Aucune donnée à exporter vers Parquet.")
+            return ""
+        # Imported here only: xlsx-only runs never load the optional, heavy pyarrow package
+        try:
+            import pyarrow  # noqa: F401  (pip install call-analyzer[parquet])
+        except ImportError:
+            logger.error("L'export Parquet nécessite pyarrow (pip install call-analyzer[parquet]).")
+            return ""
+
+        # Native parquet duration type
+        export_df = ExcelExporter._build_calls_export_df(
+            df, pd.to_timedelta(df['billsec'].fillna(0), unit='s'), extensions_dict)
+
+        os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else '.', exist_ok=True)
+
+        try:
+            export_df.to_parquet(filename, engine='pyarrow', compression='zstd', index=False)
+            logger.info(f"Données exportées avec succès vers {filename}")
+            return filename
+        except Exception as e:
+            logger.error(f"Erreur lors de l'export vers Parquet: {e}")
+            return ""
+
     @staticmethod
     def export_statistics_to_excel(df: pd.DataFrame, statistics: Dict[str, Union[int, float]],
                                     filename: str, period: str) -> str:
@@ -135,53 +264,56 @@ class ExcelExporter:
             {'Métrique': 'Appels Click-to-Call', 'Valeur': statistics['nb_click_to_call']},
         ])
 
+        # Every sheet is prepared first, then the workbook is written in a single pass
+        sheets = {'Stats Globales': global_stats_df}
+
+        if not hourly_stats.empty:
+            h = hourly_stats.copy()
+            h['duree_totale_format'] = ExcelExporter.excel_duration_series(h['duree_totale'])
+            h['duree_moyenne_format'] = ExcelExporter.excel_duration_series(h['duree_moyenne'])
+            h['taux_reponse'] = (h['nb_appels_repondus'] / h['nb_appels'] * 100).round(1)
+            h['heure_format'] = h['hour'].apply(lambda x: f"{x:02d}h-{x + 1:02d}h")
+            out = h[['heure_format', 'nb_appels', 'nb_appels_repondus', 'taux_reponse',
+                      'duree_totale_format', 'duree_moyenne_format']]
+            out.columns = ['Heure', 'Nb Appels', 'Nb Répondus', 'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
+            sheets['Stats par Heure'] = out
+
+        if not daily_stats.empty:
+            d = daily_stats.copy()
+            d['duree_totale_format'] = ExcelExporter.excel_duration_series(d['duree_totale'])
+            d['duree_moyenne_format'] = ExcelExporter.excel_duration_series(d['duree_moyenne'])
+            d['taux_reponse'] = (d['nb_appels_repondus'] / d['nb_appels'] * 100).round(1)
+            d['date_format'] = pd.to_datetime(d['date']).dt.strftime('%d/%m/%Y')
+            out = d[['date_format', 'nb_appels', 'nb_appels_recus', 'nb_appels_emis',
+                      'nb_appels_repondus', 'taux_reponse', 'duree_totale_format', 'duree_moyenne_format']]
+            out.columns = ['Date', 'Nb Appels', 'Nb Reçus', 'Nb Émis', 'Nb Répondus',
+                           'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
+            sheets['Stats par Jour'] = out
+
+        if not top_dest.empty:
+            td = top_dest.copy()
+            td['duree_totale_format'] = ExcelExporter.excel_duration_series(td['duree_totale'])
+            td['duree_moyenne_format'] = ExcelExporter.excel_duration_series(td['duree_moyenne'])
+            out = td[['dst', 'nb_appels', 'nb_repondus', 'taux_reponse', 'duree_totale_format', 'duree_moyenne_format']]
+            out.columns = ['Destination', 'Nb Appels', 'Nb Répondus', 'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
+            sheets['Top Destinations'] = out
+
+        if not top_src.empty:
+            ts = top_src.copy()
+            ts['duree_totale_format'] = ExcelExporter.excel_duration_series(ts['duree_totale'])
+            ts['duree_moyenne_format'] = ExcelExporter.excel_duration_series(ts['duree_moyenne'])
+            out = ts[['src', 'nb_appels', 'nb_repondus', 'taux_reponse', 'duree_totale_format', 'duree_moyenne_format']]
+            out.columns = ['Source', 'Nb Appels', 'Nb Répondus', 'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
+            sheets['Top Sources'] = out
+
         try:
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                global_stats_df.to_excel(writer, sheet_name='Stats Globales', index=False)
-                ExcelExporter._auto_column_widths(writer.sheets['Stats Globales'], global_stats_df)
-
-                if not hourly_stats.empty:
-                    h = hourly_stats.copy()
-                    h['duree_totale_format'] = ExcelExporter._format_duration_series(h['duree_totale'])
-                    h['duree_moyenne_format'] = ExcelExporter._format_duration_series(h['duree_moyenne'])
-                    h['taux_reponse'] = (h['nb_appels_repondus'] / h['nb_appels'] * 100).round(1)
-                    h['heure_format'] = h['hour'].apply(lambda x: f"{x:02d}h-{x + 1:02d}h")
-                    out = h[['heure_format', 'nb_appels', 'nb_appels_repondus', 'taux_reponse',
-                              'duree_totale_format', 'duree_moyenne_format']]
-                    out.columns = ['Heure', 'Nb Appels', 'Nb Répondus', 'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
-                    out.to_excel(writer, sheet_name='Stats par Heure', index=False)
-                    ExcelExporter._auto_column_widths(writer.sheets['Stats par Heure'], out)
-
-                if not daily_stats.empty:
-                    d = daily_stats.copy()
-                    d['duree_totale_format'] = ExcelExporter._format_duration_series(d['duree_totale'])
-                    d['duree_moyenne_format'] = ExcelExporter._format_duration_series(d['duree_moyenne'])
-                    d['taux_reponse'] = (d['nb_appels_repondus'] / d['nb_appels'] * 100).round(1)
-                    d['date_format'] = pd.to_datetime(d['date']).dt.strftime('%d/%m/%Y')
-                    out = d[['date_format', 'nb_appels', 'nb_appels_recus', 'nb_appels_emis',
-                              'nb_appels_repondus', 'taux_reponse', 'duree_totale_format', 'duree_moyenne_format']]
-                    out.columns = ['Date', 'Nb Appels', 'Nb Reçus', 'Nb Émis', 'Nb Répondus',
-                                   'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
-                    out.to_excel(writer, sheet_name='Stats par Jour', index=False)
-                    ExcelExporter._auto_column_widths(writer.sheets['Stats par Jour'], out)
-
-                if not top_dest.empty:
-                    td = top_dest.copy()
-                    td['duree_totale_format'] = ExcelExporter._format_duration_series(td['duree_totale'])
-                    td['duree_moyenne_format'] = ExcelExporter._format_duration_series(td['duree_moyenne'])
-                    out = td[['dst', 'nb_appels', 'nb_repondus', 'taux_reponse', 'duree_totale_format', 'duree_moyenne_format']]
-                    out.columns = ['Destination', 'Nb Appels', 'Nb Répondus', 'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
-                    out.to_excel(writer, sheet_name='Top Destinations', index=False)
-                    ExcelExporter._auto_column_widths(writer.sheets['Top Destinations'], out)
-
-                if not top_src.empty:
-                    ts = top_src.copy()
-                    ts['duree_totale_format'] = ExcelExporter._format_duration_series(ts['duree_totale'])
-                    ts['duree_moyenne_format'] = ExcelExporter._format_duration_series(ts['duree_moyenne'])
-                    out = ts[['src', 'nb_appels', 'nb_repondus', 'taux_reponse', 'duree_totale_format', 'duree_moyenne_format']]
-                    out.columns = ['Source', 'Nb Appels', 'Nb Répondus', 'Taux Réponse (%)', 'Durée Totale', 'Durée Moyenne']
-                    out.to_excel(writer, sheet_name='Top Sources', index=False)
-                    ExcelExporter._auto_column_widths(writer.sheets['Top Sources'], out)
+            with xlsxwriter.Workbook(filename) as workbook:
+                # One header and one duration format registered for the whole workbook
+                header_format = workbook.add_format(_HEADER_FORMAT)
+                duration_format = workbook.add_format(_DURATION_FORMAT)
+                for sheet_name, out in sheets.items():
+                    ExcelExporter._write_rows(workbook, sheet_name, out, header_format=header_format,
+                                              duration_format=duration_format)
 
             logger.info(f"Statistiques exportées avec succès vers {filename}")
             return filename
@@ -1,11 +1,21 @@
+import re
+import time
+
 import requests
 from gql import Client, gql
 from gql.transport.requests import RequestsHTTPTransport
 
+_SCHEME_RE = re.compile(r'^https?://')
+
 
 class GqlConnector:
     """Connexion synchrone à l'API GraphQL de l'IPBX."""
 
+    # Renew the token slightly before the IPBX considers it expired
+    TOKEN_EXPIRY_MARGIN = 30
+    # Used when the token response has no expires_in
+    DEFAULT_TOKEN_LIFETIME = 3600
+
     def __init__(self, hostname: str, client_id: str, client_secret: str, scope: str = None):
         self.hostname = self._sanitize_hostname(hostname)
         self.client_id = client_id
@@ -14,11 +24,20 @@ class GqlConnector:
         self.token_url = f"http://{self.hostname}/admin/api/api/token"
         self.api_url = f"http://{self.hostname}/admin/api/api/gql"
         self._client: Client = None
+        self._session = None
+        self._token: str = None
+        self._token_expiry = 0.0
 
     def _sanitize_hostname(self, hostname: str) -> str:
-        return hostname.replace("http://", "").replace("https://", "").strip().split("/")[0]
+        return _SCHEME_RE.sub('', hostname.strip()).split('/', 1)[0]
+
+    def _token_valid(self) -> bool:
+        return self._token is not None and time.time() < self._token_expiry - self.TOKEN_EXPIRY_MARGIN
 
     def _request_token(self) -> str:
+        """Retourne le token OAuth, mis en cache jusqu'à son expiration (expires_in)."""
+        if self._token_valid():
+            return self._token
         data = {'grant_type': 'client_credentials'}
         if self.scope:
             data['scope'] = self.scope
@@ -29,12 +48,19 @@ class GqlConnector:
         token_type = payload.get("token_type")
         access_token = payload.get("access_token")
         if token_type and access_token:
-            return f"{token_type} {access_token}"
+            self._token = f"{token_type} {access_token}"
+            self._token_expiry = time.time() + float(payload.get("expires_in") or self.DEFAULT_TOKEN_LIFETIME)
+            return self._token
         raise ValueError("Token ou type de token manquant dans la réponse de l'IPBX.")
 
-    def _get_client(self) -> Client:
-        """Retourne un client GQL, en le créant si nécessaire (lazy init)."""
-        if self._client is None:
+    def _get_session(self):
+        """Retourne une session GQL connectée, recréée uniquement quand le token expire.
+
+        The session keeps the underlying requests.Session (and its TCP/TLS connection)
+        open between queries instead of reconnecting for each one.
+        """
+        if self._session is None or not self._token_valid():
+            self.close()
             token = self._request_token()
             transport = RequestsHTTPTransport(
                 url=self.api_url,
@@ -42,13 +68,30 @@ class GqlConnector:
                 verify=True,
                 retries=1,
             )
+            # Stored before connecting, so close() still reaches a client whose connection failed
             self._client = Client(transport=transport, fetch_schema_from_transport=False)
-        return self._client
+            try:
+                self._session = self._client.connect_sync()
+            except Exception:
+                self.close()
+                raise
+        return self._session
 
-    def execute_gql_query(self, query: str):
-        client = self._get_client()
-        result = client.execute(gql(query))
+    def close(self):
+        """Ferme la session GQL ouverte, le cas échéant."""
+        if self._client is not None:
+            client = self._client
+            self._session = None
+            self._client = None
+            client.close_sync()
+
+    @staticmethod
+    def _check_result(result: dict) -> dict:
         first_key = next(iter(result))
         if not result[first_key].get('status'):
             raise ValueError(f"Erreur dans la requête GraphQL : {result[first_key].get('message')}")
         return result
+
+    def execute_gql_query(self, query: str):
+        session = self._get_session()
+        return self._check_result(session.execute(gql(query)))
@@ -1,9 +1,47 @@
+import functools
 import logging
+import re
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Accepted report bounds; anything else is rejected rather than guessed
+_DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',  # 2025-01-01 00:00:00
+    '%Y-%m-%d',  # 2025-01-01
+    '%d/%m/%Y %H:%M:%S',  # 01/01/2025 00:00:00
+    '%d/%m/%Y',  # 01/01/2025
+)
+
+# National prefix of a French number: +33 or a single leading 0
+_NATIONAL_PREFIX_RE = re.compile(r'^(?:\+33|0)')
+
+# GQL document for extensions and ring groups; static, so shared by every call
+_INTERNAL_NUMBERS_QUERY = """
+query {
+  fetchAllExtensions {
+    status
+    message
+    extension {
+      extensionId
+      user {
+        name
+      }
+    }
+  }
+  fetchAllRingGroups {
+    status
+    message
+    ringgroups {
+      groupNumber
+      description
+    }
+  }
+}
+"""
+
+
 class QueryBuilder:
     """Construit des requêtes SQL pour l'extraction des données d'appels."""
 
@@ -18,66 +56,62 @@ class QueryBuilder:
             Date formatée pour SQL
         """
         try:
-            # Support multiple date formats
-            formats = [
-                '%Y-%m-%d %H:%M:%S',  # 2025-01-01 00:00:00
-                '%Y-%m-%d',  # 2025-01-01
-                '%d/%m/%Y %H:%M:%S',  # 01/01/2025 00:00:00
-                '%d/%m/%Y'  # 01/01/2025
-            ]
-
-            for fmt in formats:
+            for fmt in _DATE_FORMATS:
                 try:
-                    parsed_date = datetime.strptime(date_str, fmt)
-                    return parsed_date.strftime('%Y-%m-%d %H:%M:%S')
+                    return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d %H:%M:%S')
                 except ValueError:
                     continue
-
-            # Si aucun format n'a fonctionné
             raise ValueError(f"Format de date non reconnu: {date_str}")
         except Exception as e:
             logger.error(f"Erreur lors du formatage de la date {date_str}: {e}")
             raise
 
     @staticmethod
-    def build_filter_condition(numeros: List[str]) -> str:
-        """Construit une condition de filtrage SQL pour les numéros spécifiés.
+    def build_filter_condition(numeros: List[str]) -> Tuple[str, Dict[str, str]]:
+        """Construit une condition de filtrage SQL paramétrée pour les numéros spécifiés.
+
+        Les numéros sont passés en paramètres liés (listes IN) plutôt qu'interpolés, ce qui
+        garde un texte de requête stable et laisse l'optimiseur sonder l'ensemble des numéros.
 
         Args:
             numeros: Liste de numéros à filtrer
 
         Returns:
-            Condition SQL formatée
+            Condition SQL formatée et dictionnaire des paramètres à lier
         """
         if not numeros:
-            return ""
+            return "", {}
+
+        # The fragment only depends on the set of numbers; callers get their own params dict
+        condition, params = QueryBuilder._build_filter_condition_cached(tuple(sorted(set(numeros))))
+        return condition, dict(params)
 
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _build_filter_condition_cached(numeros: Tuple[str, ...]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
         clean_numbers = []
         for num in numeros:
-            # Standardisation des numéros (suppression des préfixes internationaux)
-            if num.startswith('+33'):
-                clean_numbers.append(num[3:])
-                clean_numbers.append('0' + num[3:])
-            elif num.startswith('0'):
-                clean_numbers.append(num)
-                clean_numbers.append(num[1:])
-            else:
-                clean_numbers.append(num)
-                clean_numbers.append('0' + num)
-
-        conditions = []
-        for num in set(clean_numbers):  # Utilisation d'un set pour éviter les doublons
-            conditions.append(f"src = '{num}'")
-            conditions.append(f"dst = '{num}'")
-            conditions.append(f"did = '{num}'")
-            conditions.append(f"cnum = '{num}'")
-            conditions.append(f"channel LIKE '%PJSIP/{num}%'")
-            conditions.append(f"dstchannel LIKE '%PJSIP/{num}%'")
-
-        return " AND (" + " OR ".join(conditions) + ")"
+            # Standardisation des numéros : forme sans préfixe national et forme en 0
+            core = _NATIONAL_PREFIX_RE.sub('', num, count=1)
+            clean_numbers.append(core)
+            clean_numbers.append('0' + core)
+
+        # Tri + set : pas de doublons et un texte de requête identique d'une exécution à l'autre
+        unique_numbers = sorted(set(clean_numbers))
+        params = {f'num_{i}': num for i, num in enumerate(unique_numbers)}
+        in_list = "(" + ", ".join(f":{name}" for name in params) + ")"
+        # Une seule REGEXP remplace un LIKE '%PJSIP/num%' par numéro
+        params['channel_re'] = 'PJSIP/(' + '|'.join(re.escape(num) for num in unique_numbers) + ')'
+
+        condition = (
+            f" AND (src IN {in_list} OR dst IN {in_list} OR did IN {in_list} OR cnum IN {in_list}"
+            " OR channel REGEXP :channel_re OR dstchannel REGEXP :channel_re)"
+        )
+        return condition, tuple(params.items())
 
     @staticmethod
-    def build_call_query(date_debut: str, date_fin: str, numeros: Optional[List[str]] = None) -> str:
+    def build_call_query(date_debut: str, date_fin: str,
+                         numeros: Optional[List[str]] = None) -> Tuple[str, Dict[str, str]]:
         """Construit une requête SQL pour récupérer les appels dans une plage de dates.
 
         Args:
@@ -86,18 +120,21 @@ class QueryBuilder:
             numeros: Liste des numéros à filtrer (optionnel)
 
         Returns:
-            Requête SQL formatée
+            Requête SQL formatée et paramètres à lier
         """
         # Formatage des dates
         date_debut_sql = QueryBuilder.format_date(date_debut)
         date_fin_sql = QueryBuilder.format_date(date_fin)
 
         # Construction de la condition de filtrage
-        filter_condition = QueryBuilder.build_filter_condition(numeros) if numeros else ""
+        filter_condition, params = QueryBuilder.build_filter_condition(numeros) if numeros else ("", {})
+        params.update({'date_debut': date_debut_sql, 'date_fin': date_fin_sql})
 
-        # Requête optimisée avec CTE (Common Table Expression) pour meilleures performances
+        # Only the columns the analysis reads (amaflags, duration and clid are left out).
+        # Jointure explicite sur les linkedid retenus : évite que le IN (...) soit
+        # réévalué comme sous-requête dépendante
         query = f"""
-            SELECT 
+            SELECT
                 c.calldate,
                 c.uniqueid,
                 c.linkedid,
@@ -114,22 +151,20 @@ class QueryBuilder:
                 c.cnam,
                 c.did,
                 c.accountcode,
-                c.userfield,
-                c.amaflags,
-                c.duration,
-                c.clid
+                c.userfield
             FROM asteriskcdrdb.cdr c
-            WHERE c.calldate BETWEEN '{date_debut_sql}' AND '{date_fin_sql}'
-            AND c.lastapp = 'Dial'
-            AND c.linkedid IN (
-                SELECT DISTINCT linkedid
+            INNER JOIN (
+                SELECT linkedid
                 FROM asteriskcdrdb.cdr
-                WHERE calldate BETWEEN '{date_debut_sql}' AND '{date_fin_sql}'
+                WHERE calldate BETWEEN :date_debut AND :date_fin
                 {filter_condition}
-            )
+                GROUP BY linkedid
+            ) f ON c.linkedid = f.linkedid
+            WHERE c.calldate BETWEEN :date_debut AND :date_fin
+            AND c.lastapp = 'Dial'
             ORDER BY c.linkedid, c.sequence
         """
-        return query
+        return query, params
 
     @staticmethod
     def build_billing_sda_filter(sda_numbers: List[str]) -> str:
@@ -205,27 +240,4 @@ class QueryBuilder:
         Returns:
             Requête GQL formatée
         """
-        return """
-        query {
-          fetchAllExtensions {
-            status
-            message
-            totalCount
-            extension {
-              extensionId
-              user {
-                name
-              }
-            }
-          }
-          fetchAllRingGroups {
-            status
-            message
-            totalCount
-            ringgroups {
-              groupNumber
-              description
-            }
-          }
-        }
-        """
\ No newline at end of file
+        return _INTERNAL_NUMBERS_QUERY
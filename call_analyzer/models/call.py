@@ -2,7 +2,9 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional
 
-@dataclass
+
+# No per-instance __dict__
+@dataclass(slots=True)
 class Call:
     """Représente un appel complet agrégé à partir des événements."""
     start_time: datetime
@@ -1,9 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Dict, List
 import re
 
-@dataclass
+
+# No per-instance __dict__
+@dataclass(slots=True)
 class CallEvent:
     """
     Représente un événement d'appel individuel dans le système Asterisk/FreePBX.
@@ -54,6 +56,28 @@ class CallEvent:
     # Enregistrement
     recordingfile: Optional[str] = None  # Fichier d'enregistrement de l'appel
 
+    # Numéros portés par channel / dstchannel, pré-calculés par colonne dans process_dataframe
+    channel_number: Optional[str] = field(default=None, repr=False, compare=False)
+    dstchannel_number: Optional[str] = field(default=None, repr=False, compare=False)
+
+    # Indicateurs de canal calculés une fois à la construction (lus par les passes de l'analyseur)
+    is_forward_leg: bool = field(init=False, repr=False, compare=False)  # Local/0... en from-internal
+    is_group_leg: bool = field(init=False, repr=False, compare=False)  # ext-group vers un canal Local
+    has_trunk_channel: bool = field(init=False, repr=False, compare=False)
+    has_trunk_dstchannel: bool = field(init=False, repr=False, compare=False)
+    is_local_dstchannel: bool = field(init=False, repr=False, compare=False)
+    is_local0_dstchannel: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        channel = self.channel or ''
+        dstchannel = self.dstchannel or ''
+        self.is_forward_leg = 'Local/0' in channel and self.context == 'from-internal'
+        self.is_group_leg = self.context == 'ext-group' and 'Local/' in dstchannel
+        self.has_trunk_channel = 'trunk' in channel.lower()
+        self.has_trunk_dstchannel = 'trunk' in dstchannel.lower()
+        self.is_local_dstchannel = 'Local/' in dstchannel
+        self.is_local0_dstchannel = 'Local/0' in dstchannel
+
     def wait_time(self) -> Optional[int]:
         """
         Calcule le temps d'attente avant réponse en secondes.
@@ -7,8 +7,8 @@ def main():
     date_debut = '2026-04-01 00:00:00'
     date_fin = '2026-04-30 23:59:59'
     # Création de l'application d'analyse
-    analyzer_app = CDRAnalyzerApp(config)
-    statistics = analyzer_app.run_analysis(date_debut, date_fin, export=True, output_dir='./output')
+    with CDRAnalyzerApp(config) as analyzer_app:
+        statistics = analyzer_app.run_analysis(date_debut, date_fin, export=True, output_dir='./output')
     print(statistics)
 
 if __name__ == '__main__':
@@ -27,7 +27,14 @@ class CDRAnalyzerApp:
                 - db_host: Adresse du serveur de base de données
                 - db_port: Port de la base de données
                 - db_charset: Jeu de caractères pour la connexion (optionnel)
+                - db_fast_path: Lecture des CDR via connectorx si installé (optionnel)
+                - db_pool_size: Taille du pool de connexions SQLAlchemy (optionnel)
+                - db_dtype_backend: 'pyarrow' pour des colonnes Arrow au lieu d'objets Python (optionnel)
                 - reference_numbers: Liste des numéros de référence (optionnel)
+                - calls_export_format: 'xlsx' (défaut) ou 'parquet' pour la liste des appels (optionnel)
+                - excel_max_rows: Nombre de lignes par fichier Excel d'appels avant découpage, 1 à 1 048 575 (optionnel)
+                - analysis_workers: Nombre de processus pour l'analyse des appels, 1 par défaut (optionnel)
+                - path_details: False pour ne pas construire la colonne path_details, inutilisée par les exports (optionnel)
         """
         self.config = config
         self.db_connector = DatabaseConnector(
@@ -36,7 +43,10 @@ class CDRAnalyzerApp:
             database_name=config['db_name'],
             host=config['db_host'],
             port=config['db_port'],
-            charset=config.get('db_charset')
+            charset=config.get('db_charset'),
+            fast_path=config.get('db_fast_path', False),
+            pool_size=config.get('db_pool_size', DatabaseConnector.POOL_SIZE),
+            dtype_backend=config.get('db_dtype_backend'),
         )
         self.gql_connector = GqlConnector(
             hostname=config['db_host'],
@@ -50,23 +60,30 @@ class CDRAnalyzerApp:
         self.ring_group_numbers = set()
         self.extensions_dict = {}
 
+    def close(self):
+        """Libère les connexions ouvertes par l'application (session GraphQL)."""
+        self.gql_connector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _load_internal_numbers(self):
         """Charge les numéros internes depuis la base de données."""
         try:
             query = QueryBuilder.build_internal_numbers_query()
             result = self.gql_connector.execute_gql_query(query)
-            extensions = list(map(lambda x: x['extensionId'], result['fetchAllExtensions']['extension']))
-            ring_groups = list(map(lambda x: str(x['groupNumber']), result['fetchAllRingGroups']['ringgroups']))
-            self.extension_numbers = set(extensions)
-            self.ring_group_numbers = set(ring_groups)
+            extensions = result['fetchAllExtensions']['extension']
+            ring_groups = result['fetchAllRingGroups']['ringgroups']
+            self.extension_numbers = {str(x['extensionId']) for x in extensions}
+            self.ring_group_numbers = {str(x['groupNumber']) for x in ring_groups}
             self.internal_numbers = self.extension_numbers.union(self.ring_group_numbers)
             logger.info(f"Chargement réussi de {len(self.internal_numbers)} numéros internes")
-            result_extensions_dict = result['fetchAllExtensions']['extension']
-            df = pd.json_normalize(result_extensions_dict)
-            self.extensions_dict = dict(zip(df['extensionId'], df['user.name']))
-            result_ring_groups_dict = result['fetchAllRingGroups']['ringgroups']
-            df = pd.json_normalize(result_ring_groups_dict)
-            self.extensions_dict.update(dict(zip(df['groupNumber'].astype(str), df['description'])))
+            # Shallow records: read the two fields directly instead of building DataFrames
+            self.extensions_dict = {x['extensionId']: (x.get('user') or {}).get('name') for x in extensions}
+            self.extensions_dict.update({str(x['groupNumber']): x.get('description') for x in ring_groups})
         except Exception as e:
             logger.error(f"Erreur lors du chargement des numéros internes: {e}")
             self.internal_numbers = set()
@@ -93,9 +110,9 @@ class CDRAnalyzerApp:
         self._load_internal_numbers()
 
         # Construction de la requête et exécution
-        query = QueryBuilder.build_call_query(date_debut, date_fin, self.reference_numbers)
-        logger.info(f"Exécution de la requête: {query}")
-        df_calls = self.db_connector.execute_query(query)
+        query, params = QueryBuilder.build_call_query(date_debut, date_fin, self.reference_numbers)
+        logger.info(f"Exécution de la requête: {query} (paramètres: {params})")
+        df_calls = self.db_connector.execute_query(query, params)
 
         if df_calls.empty:
             logger.warning(f"Aucun appel trouvé entre {date_debut} et {date_fin}")
@@ -108,16 +125,15 @@ class CDRAnalyzerApp:
             self.ring_group_numbers,
             self.extension_numbers,
             self.extensions_dict,
+            build_path_details=self.config.get('path_details', True),
         )
-        calls = analyzer.process_dataframe(df_calls)
+        # Directement en DataFrame, sans objets Call intermédiaires
+        df_analyzed = analyzer.analyze_dataframe(df_calls, workers=self.config.get('analysis_workers', 1))
 
-        if not calls:
+        if df_analyzed.empty:
             logger.warning("Aucun appel analysé")
             return None, None
 
-        # Conversion en DataFrame
-        df_analyzed = analyzer.to_dataframe(calls)
-
         # Génération des statistiques
         statistics = StatisticsGenerator.calculate_statistics(df_analyzed, self.reference_numbers)
 
@@ -131,14 +147,22 @@ class CDRAnalyzerApp:
         # Export des données vers Excel
         files = {}
 
-        calls_file = os.path.join(output_dir, f"appels_{period_str}.xlsx")
         stats_file = os.path.join(output_dir, f"stats_appels_{period_str}.xlsx")
 
-        files['calls'] = ExcelExporter.export_calls_to_excel(df_analyzed, calls_file, self.extensions_dict)
+        # Excel caps a sheet at ~1M rows; parquet suits large raw call lists
+        if self.config.get('calls_export_format', 'xlsx') == 'parquet':
+            calls_file = os.path.join(output_dir, f"appels_{period_str}.parquet")
+            files['calls'] = ExcelExporter.export_calls_to_parquet(df_analyzed, calls_file, self.extensions_dict)
+        else:
+            calls_file = os.path.join(output_dir, f"appels_{period_str}.xlsx")
+            calls_files = ExcelExporter.export_calls_to_excel_files(
+                df_analyzed, calls_file, self.extensions_dict,
+                max_rows=self.config.get('excel_max_rows'))
+            files['calls'] = calls_files[0] if len(calls_files) == 1 else calls_files
         files['stats'] = ExcelExporter.export_statistics_to_excel(df_analyzed, statistics, stats_file, period_display)
         files['status'] = 'success'
 
-        logger.info(f"Analyse terminée: {len(calls)} appels analysés")
+        logger.info(f"Analyse terminée: {len(df_analyzed)} appels analysés")
         logger.info(f"Fichiers générés: {files}")
 
         return statistics, files
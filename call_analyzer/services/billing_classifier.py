@@ -85,18 +85,18 @@ class BillingClassifier:
         if number in reserved:
             return ('urgence', None)
 
-        if any(number.startswith(p) for p in self._MOBILE_PREFIXES):
+        if number.startswith(self._MOBILE_PREFIXES):
             return ('mobile', None)
 
-        if any(number.startswith(p) for p in self._FIXED_PREFIXES):
+        if number.startswith(self._FIXED_PREFIXES):
             return ('fixe', None)
 
-        if any(number.startswith(p) for p in self._FREE_SVA_PREFIXES):
+        if number.startswith(self._FREE_SVA_PREFIXES):
             return ('sva_gratuit', None)
-        if len(number) == 4 and (number.startswith('30') or number.startswith('31')):
+        if len(number) == 4 and number.startswith(('30', '31')):
             return ('sva_gratuit', None)
 
-        if any(number.startswith(p) for p in self._COMM_COST_SVA_PREFIXES):
+        if number.startswith(self._COMM_COST_SVA_PREFIXES):
             return ('sva_cout_communication', None)
 
         clean = number.removeprefix('00')
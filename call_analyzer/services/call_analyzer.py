@@ -1,8 +1,14 @@
+import dataclasses
+import functools
 import logging
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
+from itertools import repeat, starmap
+from operator import attrgetter
 from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
 from ..models.call import Call
@@ -10,29 +16,91 @@ from ..models.call_event import CallEvent
 
 logger = logging.getLogger(__name__)
 
+# Path label prefix per entity type; only ring groups and extensions show a display name
+_PATH_LABEL_PREFIXES = {
+    'ring_group': 'Ring group ',
+    'extension': 'Extension ',
+    'group_member': 'Membre groupe ',
+    'internal_number': 'Interne ',
+    'external': 'Externe ',
+}
+_NAMED_ENTITY_TYPES = frozenset(('ring_group', 'extension'))
+_DISPOSITION_SUFFIXES = {'ANSWERED': ' (ANSWERED)', 'NO ANSWER': ' (NO ANSWER)'}
+# Call status when several dispositions are present, highest priority first ('FAILED' otherwise)
+_STATUS_PRIORITY = ('ANSWERED', 'BUSY', 'CONGESTION', 'NO ANSWER')
+
+# Extension number carried by a channel name: PJSIP/101-..., SIP/101-..., IAX2/101-... or Local/101@...
+# ASCII: channel names only carry ASCII digits, \d need not match other Unicode digits
+_CHANNEL_NUMBER_RE = re.compile(r'(?:PJSIP|SIP|IAX2)/(\d+)-|Local/([^@]+)@', re.ASCII)
+
+
+@functools.lru_cache(maxsize=4096)
+def _channel_number(channel: str) -> Optional[str]:
+    # The same channel is looked up several times per call (status, billsec, path passes)
+    m = _CHANNEL_NUMBER_RE.search(channel)
+    if m:
+        return (m.group(1) or m.group(2)).lstrip('9')
+    return None
+
+
+def _channel_number_values(channels: list) -> list:
+    """_channel_number over a whole column (None for an empty channel)."""
+    return [_channel_number(channel) if channel else None for channel in channels]
+
+
+def _column_values(series: pd.Series) -> list:
+    values = series.tolist()
+    # Missing values come out of tolist() as NaN (object, category) or pd.NA (nullable, Arrow);
+    # the analysis tests them as None. Plain numpy numeric/datetime columns are left as they are.
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+        return values
+    if series.hasnans:
+        values = [None if missing else value for value, missing in zip(values, series.isna().tolist())]
+    return values
+
+
+# CDR columns read into each CallEvent (cnam onwards are optional;
+# build_call_query no longer selects amaflags, duration and clid)
+_EVENT_COLUMNS = (
+    'calldate', 'uniqueid', 'linkedid', 'src', 'dst', 'channel', 'dstchannel', 'disposition', 'cnum',
+    'billsec', 'sequence', 'context', 'lastapp', 'cnam', 'did', 'accountcode', 'userfield',
+    'amaflags', 'duration', 'clid',
+)
+# CallEvent constructor arguments in positional order; rows are laid out the same way
+_EVENT_FIELDS = tuple(f.name for f in dataclasses.fields(CallEvent) if f.init)
+# Event field fed by a differently named CDR column
+_EVENT_SOURCE_COLUMNS = {'timestamp': 'calldate'}
+
+# Call fields in declaration order: the tuple layout of analyze_call_to_row
+_CALL_FIELDS = tuple(f.name for f in dataclasses.fields(Call))
+
 
 class CallAnalyzer:
     """Analyse les données d'appels pour extraire des informations pertinentes."""
 
+    # Below this many calls, starting worker processes costs more than it saves
+    PARALLEL_MIN_CALLS = 20_000
+
     def __init__(self, internal_numbers: Set[str], reference_numbers: Optional[List[str]] = None,
                  ring_group_numbers: Optional[Set[str]] = None, extension_numbers: Optional[Set[str]] = None,
-                 display_names: Optional[Dict[str, str]] = None):
-        self.internal_numbers = {str(number) for number in internal_numbers}
+                 display_names: Optional[Dict[str, str]] = None, build_path_details: bool = True):
+        self.internal_numbers = frozenset(str(number) for number in internal_numbers)
         self.reference_numbers = reference_numbers
-        self.ring_group_numbers = {str(number) for number in ring_group_numbers} if ring_group_numbers else set()
-        self.extension_numbers = {str(number) for number in extension_numbers} if extension_numbers else set()
+        # Membership tests go through the set; the list keeps the caller's order
+        self.reference_numbers_set = frozenset(str(number) for number in reference_numbers or ())
+        # Status and billsec switch to per-event matching when exactly one reference is given;
+        # that number is kept so the per-event test is a plain string comparison
+        self._single_reference = (str(next(iter(reference_numbers)))
+                                  if reference_numbers and len(reference_numbers) == 1 else None)
+        self.ring_group_numbers = frozenset(str(number) for number in ring_group_numbers or ())
+        self.extension_numbers = frozenset(str(number) for number in extension_numbers or ())
         self.display_names = {
             str(number): display
             for number, display in (display_names or {}).items()
             if display
         }
-        # Compile once — used many times per analysis run
-        self._channel_patterns = [
-            re.compile(r'PJSIP/(\d+)-'),
-            re.compile(r'Local/([^@]+)@'),
-            re.compile(r'SIP/(\d+)-'),
-            re.compile(r'IAX2/(\d+)-'),
-        ]
+        # path_details (one dict per step) is only needed by callers reading the structured path
+        self.build_path_details = build_path_details
 
     def _is_internal_number(self, number: str) -> bool:
         return str(number) in self.internal_numbers
@@ -57,58 +125,78 @@ class CallAnalyzer:
     def _get_path_display(self, number: str) -> Optional[str]:
         return self.display_names.get(str(number))
 
-    def _format_path_label(self, number: str, call_type: str, disposition: str = None) -> str:
-        entity_type = self._get_path_entity_type(number, call_type)
-        display = self._get_path_display(number)
-        if entity_type == 'ring_group':
-            label = f"Ring group {display} ({number})" if display else f"Ring group {number}"
-        elif entity_type == 'extension':
-            label = f"Extension {display} ({number})" if display else f"Extension {number}"
-        elif entity_type == 'group_member':
-            label = f"Membre groupe {number}"
-        elif entity_type == 'internal_number':
-            label = f"Interne {number}"
+    @staticmethod
+    def _build_path_label(number: str, entity_type: str, display: Optional[str],
+                          disposition: str = None) -> str:
+        prefix = _PATH_LABEL_PREFIXES[entity_type]
+        if display and entity_type in _NAMED_ENTITY_TYPES:
+            label = f"{prefix}{display} ({number})"
         else:
-            label = f"Externe {number}"
+            label = f"{prefix}{number}"
+        return label + _DISPOSITION_SUFFIXES.get(disposition, '')
 
-        if disposition == 'ANSWERED':
-            return f"{label} (ANSWERED)"
-        if disposition == 'NO ANSWER':
-            return f"{label} (NO ANSWER)"
-        return label
+    def _format_path_label(self, number: str, call_type: str, disposition: str = None) -> str:
+        entity_type = self._get_path_entity_type(number, call_type)
+        return self._build_path_label(number, entity_type, self._get_path_display(number), disposition)
 
     def _extract_number_from_channel(self, channel: str) -> Optional[str]:
         if not channel:
             return None
-        for pattern in self._channel_patterns:
-            m = pattern.search(channel)
-            if m:
-                return m.group(1).lstrip('9')
-        return None
+        return _channel_number(channel)
+
+    def _get_channel_numbers(self, events: List[CallEvent]) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """Numéros extraits de channel et dstchannel, une fois par événement."""
+        # Events built by process_dataframe carry the numbers already; others are looked up here
+        return ([e.channel_number if e.channel_number is not None
+                 else self._extract_number_from_channel(e.channel) for e in events],
+                [e.dstchannel_number if e.dstchannel_number is not None
+                 else self._extract_number_from_channel(e.dstchannel) for e in events])
+
+    def _scan_call_flags(self, events: List[CallEvent]) -> Tuple[
+            bool, bool, bool, bool, bool, Set[str], List[CallEvent]]:
+        """Single pre-scan of a call's events.
+
+        Returns (has_forward, has_group, trunk_in_channel, trunk_in_dstchannel, is_ctc, dispositions,
+        forward_events).
+        """
+        forward_events: List[CallEvent] = []
+        has_group = False
+        trunk_in_channel = False
+        trunk_in_dstchannel = False
+        is_ctc = False
+        dispositions: Set[str] = set()
+
+        # Channel substring checks are precomputed on each CallEvent
+        for e in events:
+            if e.is_forward_leg:
+                forward_events.append(e)
+            has_group = has_group or e.is_group_leg
+            trunk_in_channel = trunk_in_channel or e.has_trunk_channel
+            trunk_in_dstchannel = trunk_in_dstchannel or e.has_trunk_dstchannel
+            if not is_ctc and e.cnam and 'Répondre pour appeler le' in e.cnam:
+                is_ctc = True
+            dispositions.add(e.disposition)
 
-    def _check_if_forward(self, events: List[CallEvent]) -> bool:
-        return any('Local/0' in e.channel and e.context == 'from-internal' for e in events)
+        return (bool(forward_events), has_group, trunk_in_channel, trunk_in_dstchannel, is_ctc, dispositions,
+                forward_events)
 
     def _get_forward_call_events(self, events: List[CallEvent]) -> List[CallEvent]:
-        return [e for e in events if 'Local/0' in e.channel and e.context == 'from-internal']
-
-    def _check_if_group_call(self, events: List[CallEvent]) -> bool:
-        return any(e.context == 'ext-group' and 'Local/' in e.dstchannel for e in events)
+        return [e for e in events if e.is_forward_leg]
 
     def _get_call_direction(self, events: List[CallEvent], is_internal: bool,
                             trunk_in_channel: bool = None, trunk_in_dstchannel: bool = None) -> str:
         if is_internal:
             if self.reference_numbers:
-                if events[0].src in self.reference_numbers:
+                if events[0].src in self.reference_numbers_set:
                     return 'sortant'
-                if events[0].dst in self.reference_numbers:
+                if events[0].dst in self.reference_numbers_set:
                     return 'entrant'
             return 'interne'
 
-        if trunk_in_channel is None:
-            trunk_in_channel = any('trunk' in e.channel.lower() for e in events)
-        if trunk_in_dstchannel is None:
-            trunk_in_dstchannel = any('trunk' in e.dstchannel.lower() for e in events)
+        if trunk_in_channel is None or trunk_in_dstchannel is None:
+            _, _, scanned_channel, scanned_dstchannel, _, _, _ = self._scan_call_flags(events)
+            trunk_in_channel = scanned_channel if trunk_in_channel is None else trunk_in_channel
+            trunk_in_dstchannel = scanned_dstchannel if trunk_in_dstchannel is None else trunk_in_dstchannel
 
         if trunk_in_channel:
             return 'entrant'
@@ -116,40 +204,55 @@ class CallAnalyzer:
             return 'sortant'
         return 'interne'
 
+    def _reference_mask(self, events: List[CallEvent],
+                        channel_numbers: List[Optional[str]] = None,
+                        dstchannel_numbers: List[Optional[str]] = None) -> Tuple[bool, ...]:
+        """Pour chaque événement : implique-t-il un numéro de référence (source ou destination) ?"""
+        if channel_numbers is None:
+            channel_numbers, dstchannel_numbers = self._get_channel_numbers(events)
+        reference = self._single_reference
+        if reference is not None:
+            return tuple(
+                (channel_number or event.src) == reference
+                or ((dstchannel_number if not event.is_local0_dstchannel else event.dst) or event.dst) == reference
+                for event, channel_number, dstchannel_number in zip(events, channel_numbers, dstchannel_numbers)
+            )
+        references = self.reference_numbers_set
+        return tuple(
+            (channel_number or event.src) in references
+            or ((dstchannel_number if not event.is_local0_dstchannel else event.dst) or event.dst) in references
+            for event, channel_number, dstchannel_number in zip(events, channel_numbers, dstchannel_numbers)
+        )
+
     def _get_call_status(self, events: List[CallEvent],
-                         dispositions: Set[str] = None, has_forward: bool = None) -> str:
+                         dispositions: Set[str] = None, has_forward: bool = None,
+                         channel_numbers: List[Optional[str]] = None,
+                         dstchannel_numbers: List[Optional[str]] = None,
+                         reference_mask: Tuple[bool, ...] = None) -> str:
+        if has_forward is None or dispositions is None:
+            scanned_forward, _, _, _, _, scanned_dispositions, _ = self._scan_call_flags(events)
+            has_forward = scanned_forward if has_forward is None else has_forward
+            dispositions = scanned_dispositions if dispositions is None else dispositions
+
         # Reference-number mode: check per-event which one involves our number
-        if self.reference_numbers and len(self.reference_numbers) == 1:
-            if has_forward is None:
-                has_forward = self._check_if_forward(events)
+        if self._single_reference is not None:
             if has_forward:
-                if dispositions is None:
-                    dispositions = {e.disposition for e in events}
                 return 'ANSWERED' if 'ANSWERED' in dispositions else 'NO ANSWER'
 
+            if reference_mask is None:
+                reference_mask = self._reference_mask(events, channel_numbers, dstchannel_numbers)
             status = 'NO ANSWER'
-            for event in events:
-                src = self._extract_number_from_channel(event.channel) or event.src
-                dst = (self._extract_number_from_channel(event.dstchannel)
-                       if not (event.dstchannel and 'Local/0' in event.dstchannel)
-                       else event.dst) or event.dst
-                if src in self.reference_numbers or dst in self.reference_numbers:
+            for event, touches_reference in zip(events, reference_mask):
+                if touches_reference:
                     status = event.disposition
                     if status == 'ANSWERED':
                         return status
             return status
 
         # General case — use pre-computed dispositions set
-        if dispositions is None:
-            dispositions = {e.disposition for e in events}
-        if 'ANSWERED' in dispositions:
-            return 'ANSWERED'
-        if 'BUSY' in dispositions:
-            return 'BUSY'
-        if 'CONGESTION' in dispositions:
-            return 'CONGESTION'
-        if 'NO ANSWER' in dispositions:
-            return 'NO ANSWER'
+        for status in _STATUS_PRIORITY:
+            if status in dispositions:
+                return status
         return 'FAILED'
 
     def _event_targets_number(self, event: CallEvent, number: Optional[str]) -> bool:
@@ -157,35 +260,35 @@ class CallAnalyzer:
             return False
         target = str(number)
         dst = str(event.dst or '')
-        dstchannel_number = self._extract_number_from_channel(event.dstchannel or '') or ''
+        dstchannel_number = event.dstchannel_number or self._extract_number_from_channel(event.dstchannel) or ''
         return dst == target or dstchannel_number == target
 
     def _get_call_billsec(self, events: List[CallEvent],
                           has_forward: bool = None, has_group: bool = None,
-                          forwards_to: Optional[str] = None) -> int:
+                          forwards_to: Optional[str] = None,
+                          channel_numbers: List[Optional[str]] = None,
+                          dstchannel_numbers: List[Optional[str]] = None,
+                          reference_mask: Tuple[bool, ...] = None,
+                          forward_events: List[CallEvent] = None) -> int:
         if not events:
             return 0
 
-        if has_forward is None:
-            has_forward = self._check_if_forward(events)
-        if has_group is None:
-            has_group = self._check_if_group_call(events)
+        if has_forward is None or has_group is None:
+            scanned_forward, scanned_group, _, _, _, _, _ = self._scan_call_flags(events)
+            has_forward = scanned_forward if has_forward is None else has_forward
+            has_group = scanned_group if has_group is None else has_group
 
-        if self.reference_numbers and len(self.reference_numbers) == 1:
+        if self._single_reference is not None:
             if has_forward and has_group:
                 return sum(e.billsec for e in events)
-            billsec = 0
-            for event in events:
-                src = self._extract_number_from_channel(event.channel) or event.src
-                dst = (self._extract_number_from_channel(event.dstchannel)
-                       if not (event.dstchannel and 'Local/0' in event.dstchannel)
-                       else event.dst) or event.dst
-                if src in self.reference_numbers or dst in self.reference_numbers:
-                    billsec += event.billsec
-            return billsec
+            if reference_mask is None:
+                reference_mask = self._reference_mask(events, channel_numbers, dstchannel_numbers)
+            return sum(event.billsec for event, touches_reference in zip(events, reference_mask)
+                       if touches_reference)
 
         if has_forward:
-            forward_events = self._get_forward_call_events(events)
+            if forward_events is None:
+                forward_events = self._get_forward_call_events(events)
             billsec = sum(e.billsec for e in forward_events)
             if billsec > 0:
                 return billsec
@@ -196,7 +299,7 @@ class CallAnalyzer:
                 and e.disposition == 'ANSWERED'
                 and (
                     self._event_targets_number(e, forwards_to)
-                    or (e.context in ('from-internal', 'outbound-allroutes') and 'trunk' in (e.dstchannel or '').lower())
+                    or (e.context in ('from-internal', 'outbound-allroutes') and e.has_trunk_dstchannel)
                 )
             ]
             if answered_forward_events:
@@ -208,21 +311,24 @@ class CallAnalyzer:
 
             return 0
         if has_group:
-            return sum(e.billsec for e in events if not (e.context == 'ext-group' and 'Local/' in e.dstchannel))
+            return sum(e.billsec for e in events if not e.is_group_leg)
         return sum(e.billsec for e in events)
 
-    def _identify_click_to_call(self, events: List[CallEvent]) -> Tuple[
+    def _identify_click_to_call(self, events: List[CallEvent], is_click_to_call: bool = None,
+                                forward_events: List[CallEvent] = None) -> Tuple[
             bool, Optional[str], Optional[str], int, List[str], List[str]]:
-        is_click_to_call = any(e.cnam and 'Répondre pour appeler le' in e.cnam for e in events)
+        if is_click_to_call is None:
+            is_click_to_call = any(e.cnam and 'Répondre pour appeler le' in e.cnam for e in events)
         initiator_answered: List[str] = []
         dest_forwards: List[str] = []
 
         if is_click_to_call and events:
             first_event = events[0]
-            first_event_src = self._extract_number_from_channel(first_event.channel) or first_event.src
-            event_macro_dial = next((e for e in events if 'macro-dial' in e.context), first_event)
+            first_event_src = (first_event.channel_number or self._extract_number_from_channel(first_event.channel)
+                               or first_event.src or '')
+            event_macro_dial = next((e for e in events if 'macro-dial' in (e.context or '')), first_event)
 
-            if first_event_src.startswith('0') or first_event_src.startswith('+'):
+            if first_event_src.startswith(('0', '+')):
                 src = event_macro_dial.src
             else:
                 src = first_event_src
@@ -233,7 +339,9 @@ class CallAnalyzer:
             # Base du canal CTC (sans ;1/;2) pour distinguer initiateur (;2) et destination (;1).
             ctc_base = first_event.channel.rsplit(';', 1)[0]
 
-            for fe in self._get_forward_call_events(events):
+            if forward_events is None:
+                forward_events = self._get_forward_call_events(events)
+            for fe in forward_events:
                 duration += fe.billsec
                 fwd_base = fe.channel.rsplit(';', 1)[0]
                 # Renvoi côté destination : un followme-check relie CTC;1 → Local/fwd;1.
@@ -255,55 +363,64 @@ class CallAnalyzer:
 
         return False, None, None, 0, initiator_answered, dest_forwards
 
-    def _identify_actions_by_context(self, events: List[CallEvent]) -> Tuple[
-            Optional[str], Optional[str], Optional[str], Optional[str], str, List[dict]]:
-        transfers_from = transfers_to = forwards_from = forwards_to = None
+    def _identify_actions_by_context(self, events: List[CallEvent],
+                                     channel_numbers: List[Optional[str]] = None,
+                                     dstchannel_numbers: List[Optional[str]] = None) -> Tuple[
+            Optional[str], Optional[str], str, List[dict]]:
+        if channel_numbers is None:
+            channel_numbers, dstchannel_numbers = self._get_channel_numbers(events)
+        transfers_to = forwards_to = None
         path = []
         call_path_details = []
+        build_details = self.build_path_details
         virtual_forward = ''
         seen_path_keys: Set[str] = set()
-        last_path_key = ''
-        group_members = {}
+        # Numbers already in the path, whatever their disposition suffix
+        seen_numbers: Set[str] = set()
+        # Base number (first token) of the last path entry, kept alongside instead of re-split
+        last_path_base = ''
         internal_calls = {}
 
         def base_number(number: str) -> str:
-            return number.split(" ")[0] if number else ''
+            # Path numbers rarely carry a space: skip the split (and its list) in that case
+            if not number:
+                return ''
+            return number if ' ' not in number else number.split(' ', 1)[0]
 
         def add_to_path(number: str, call_type: str, disposition: str = None, timestamp=None):
-            nonlocal last_path_key
+            nonlocal last_path_base
             if not number:
                 return
-            suffix = f" ({disposition})" if disposition == 'ANSWERED' else ''
-            path_key = number + suffix
-            if (base_number(last_path_key) != base_number(path_key)
-                    and path_key not in seen_path_keys
-                    and base_number(path_key) != virtual_forward):
-                path.append(self._format_path_label(number, call_type, disposition))
+            # The suffix starts with a space, so the key's base number is the number's own
+            base = base_number(number)
+            if base == last_path_base or base == virtual_forward:
+                return
+            path_key = number + ' (ANSWERED)' if disposition == 'ANSWERED' else number
+            if path_key not in seen_path_keys:
+                # Entity type and display are shared by the label and the details entry
+                entity_type = self._get_path_entity_type(number, call_type)
+                display = self._get_path_display(number)
+                path.append(self._build_path_label(number, entity_type, display, disposition))
                 seen_path_keys.add(path_key)
-                last_path_key = path_key
-                call_path_details.append({
-                    'number': number,
-                    'display': self._get_path_display(number),
-                    'type': call_type,
-                    'entity_type': self._get_path_entity_type(number, call_type),
-                    'disposition': disposition,
-                    'timestamp': timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp,
-                })
-
-        # Première passe: groupes et appels internes
-        for event in events:
-            is_local = event.dstchannel and 'Local/' in event.dstchannel
-            src_number = self._extract_number_from_channel(event.channel) or event.src
-            group_member_number = self._extract_number_from_channel(event.dstchannel) if event.context == 'ext-group' else None
-            dst_number = (event.dst if is_local
-                          else self._extract_number_from_channel(event.dstchannel) or event.dst)
-
-            if event.context == 'ext-group':
-                group_id = event.dst
-                if group_id not in group_members:
-                    group_members[group_id] = []
-                if group_member_number and group_member_number not in group_members[group_id]:
-                    group_members[group_id].append(group_member_number)
+                seen_numbers.add(number)
+                last_path_base = base
+                if build_details:
+                    call_path_details.append({
+                        'number': number,
+                        'display': display,
+                        'type': call_type,
+                        'entity_type': entity_type,
+                        'disposition': disposition,
+                        'timestamp': timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp,
+                    })
+
+        # Une seule passe : construction du chemin ; les appels internes, lus seulement
+        # après la boucle, sont relevés au passage
+        for event, channel_number, dstchannel_number in zip(events, channel_numbers, dstchannel_numbers):
+            is_local = event.is_local_dstchannel
+            src_number = channel_number or event.src
+            group_member_number = dstchannel_number if event.context == 'ext-group' else None
+            dst_number = event.dst if is_local else dstchannel_number or event.dst
 
             if event.context == 'from-internal':
                 call_id = f"{src_number}_{dst_number}_{event.timestamp}"
@@ -314,14 +431,6 @@ class CallAnalyzer:
                     'disposition': event.disposition
                 }
 
-        # Deuxième passe: construction du chemin
-        for event in events:
-            is_local = event.dstchannel and 'Local/' in event.dstchannel
-            src_number = self._extract_number_from_channel(event.channel) or event.src
-            group_member_number = self._extract_number_from_channel(event.dstchannel) if event.context == 'ext-group' else None
-            dst_number = (event.dst if is_local
-                          else self._extract_number_from_channel(event.dstchannel) or event.dst)
-
             if src_number and dst_number and not path:
                 add_to_path(src_number, 'source', timestamp=event.timestamp)
                 if event.dst != dst_number:
@@ -344,11 +453,11 @@ class CallAnalyzer:
                 # pas un nouveau saut — le gestionnaire followme-check ci-dessous s'en charge.
                 if not (
                     (event.context == 'followme-check' and is_local)
-                    or (event.context == 'from-internal' and event.channel and 'Local/0' in event.channel)
+                    or event.is_forward_leg
                 ):
                     add_to_path(dst_number, call_type, event.disposition, timestamp=event.timestamp)
 
-            if event.context == 'followme-check' and event.dstchannel and 'Local/' in event.dstchannel:
+            if event.context == 'followme-check' and is_local:
                 if event.dst:
                     add_to_path(event.dst, 'forward_source', None, timestamp=event.timestamp)
                 local_key = event.dstchannel.split(';')[0]
@@ -357,7 +466,8 @@ class CallAnalyzer:
                     None
                 )
                 if match:
-                    fwd_number = self._extract_number_from_channel(match.dstchannel) or match.dst
+                    fwd_number = (match.dstchannel_number or self._extract_number_from_channel(match.dstchannel)
+                                  or match.dst)
                     if not forwards_to:
                         forwards_to = fwd_number
                     if event.disposition == 'ANSWERED':
@@ -366,7 +476,7 @@ class CallAnalyzer:
                         continue
 
             if event.context == 'from-internal':
-                if event.channel and 'Local/0' in event.channel:
+                if event.is_forward_leg:
                     if not forwards_to:
                         forwards_to = dst_number
                     if event.disposition == 'ANSWERED':
@@ -383,51 +493,49 @@ class CallAnalyzer:
                     add_to_path(dst_number, 'transfer_external', event.disposition, timestamp=event.timestamp)
 
             elif event.context == 'ext-group':
-                group_id = event.dst
-                if group_id in group_members and group_member_number in group_members[group_id]:
+                # The member is the event's own dstchannel number, no need for a per-group registry
+                if group_member_number:
                     if event.disposition == 'ANSWERED':
                         add_to_path(group_member_number, 'group_member_answered', event.disposition, timestamp=event.timestamp)
 
         # Appels internes manqués
         for call in internal_calls.values():
-            if call['disposition'] == 'NO ANSWER' and call['dst'] not in seen_path_keys:
-                if base_number(last_path_key) != base_number(call['dst']):
+            if call['disposition'] == 'NO ANSWER' and call['dst'] not in seen_numbers:
+                if last_path_base != base_number(call['dst']):
                     add_to_path(call['dst'], 'missed_internal', 'NO ANSWER', timestamp=call['time'])
 
-        return transfers_from, transfers_to, forwards_from, forwards_to, " --> ".join(path), call_path_details
+        return transfers_to, forwards_to, " --> ".join(path), call_path_details
 
-    def analyze_call(self, events: List[CallEvent]) -> Optional[Call]:
+    def analyze_call(self, events: List[CallEvent], presorted: bool = False) -> Optional[Call]:
+        row = self.analyze_call_to_row(events, presorted)
+        return Call(*row) if row else None
+
+    def analyze_call_to_row(self, events: List[CallEvent], presorted: bool = False) -> Optional[tuple]:
+        """Comme analyze_call, mais renvoie les champs de Call en tuple (ordre _CALL_FIELDS)."""
         if not events:
             return None
 
-        events = sorted(events, key=lambda e: e.sequence)
+        # process_dataframe hands over runs already ordered by sequence
+        if not presorted:
+            events = sorted(events, key=lambda e: e.sequence)
 
-        # Single pre-scan — collect all flags in one pass
-        has_forward = False
-        has_group = False
-        trunk_in_channel = False
-        trunk_in_dstchannel = False
-        is_ctc = False
-        dispositions: Set[str] = set()
+        # Neither path can build a call without a first destination (the CTC one uses it too)
+        if not events[0].dst:
+            return None
 
-        for e in events:
-            ch = e.channel or ''
-            dch = e.dstchannel or ''
-            if not has_forward and 'Local/0' in ch and e.context == 'from-internal':
-                has_forward = True
-            if not has_group and e.context == 'ext-group' and 'Local/' in dch:
-                has_group = True
-            if not trunk_in_channel and 'trunk' in ch.lower():
-                trunk_in_channel = True
-            if not trunk_in_dstchannel and 'trunk' in dch.lower():
-                trunk_in_dstchannel = True
-            if not is_ctc and e.cnam and 'Répondre pour appeler le' in e.cnam:
-                is_ctc = True
-            dispositions.add(e.disposition)
+        (has_forward, has_group, trunk_in_channel, trunk_in_dstchannel, is_ctc, dispositions,
+         forward_events) = self._scan_call_flags(events)
+
+        # Only the CTC path derives its source from the channel
+        if not is_ctc and not events[0].src:
+            return None
+
+        channel_numbers, dstchannel_numbers = self._get_channel_numbers(events)
 
         # Click-to-Call path
         if is_ctc:
-            _, src_ctc, dst_ctc, duration_ctc, initiator_answered, dest_forwards = self._identify_click_to_call(events)
+            _, src_ctc, dst_ctc, duration_ctc, initiator_answered, dest_forwards = self._identify_click_to_call(
+                events, is_ctc, forward_events)
             if src_ctc and dst_ctc:
                 is_both_internal = self._is_internal_number(src_ctc) and self._is_internal_number(dst_ctc)
                 # La destination a-t-elle décroché directement (pas via un renvoi) ?
@@ -435,7 +543,7 @@ class CallAnalyzer:
                 dst_answered = (
                     first_ev.disposition == 'ANSWERED'
                     and bool(first_ev.dstchannel)
-                    and 'Local/' not in first_ev.dstchannel
+                    and not first_ev.is_local_dstchannel
                 )
                 # Structure : initiateur --> [appareil répondant] --> destination --> [renvois destination]
                 path_parts = [self._format_path_label(src_ctc, 'source')]
@@ -448,158 +556,233 @@ class CallAnalyzer:
                     self._format_path_label(item.split(' ')[0], 'forward_answered', 'ANSWERED')
                     for item in dest_forwards
                 )
-                path_details = [{
-                    'number': src_ctc,
-                    'display': self._get_path_display(src_ctc),
-                    'type': 'source',
-                    'entity_type': self._get_path_entity_type(src_ctc, 'source'),
-                    'disposition': None,
-                }]
-                path_details.extend(
-                    {
-                        'number': item.split(' ')[0],
-                        'display': self._get_path_display(item.split(' ')[0]),
-                        'type': 'click_to_call_answered',
-                        'entity_type': self._get_path_entity_type(item.split(' ')[0], 'click_to_call_answered'),
-                        'disposition': 'ANSWERED',
-                    }
-                    for item in initiator_answered
-                )
-                path_details.append({
-                    'number': dst_ctc,
-                    'display': self._get_path_display(dst_ctc),
-                    'type': 'destination',
-                    'entity_type': self._get_path_entity_type(dst_ctc, 'destination'),
-                    'disposition': 'ANSWERED' if dst_answered else None,
-                })
-                path_details.extend(
-                    {
-                        'number': item.split(' ')[0],
-                        'display': self._get_path_display(item.split(' ')[0]),
-                        'type': 'forward_answered',
-                        'entity_type': self._get_path_entity_type(item.split(' ')[0], 'forward_answered'),
-                        'disposition': 'ANSWERED',
-                    }
-                    for item in dest_forwards
-                )
-                return Call(
-                    start_time=events[0].timestamp,
-                    uniqueid=events[0].linkedid,
-                    source=src_ctc,
-                    destination=dst_ctc,
-                    duration=duration_ctc,
-                    status=self._get_call_status(events, dispositions, has_forward),
-                    type=self._get_call_direction(events, is_both_internal, trunk_in_channel, trunk_in_dstchannel),
-                    is_internal=is_both_internal,
-                    transfers_from=None, transfers_to=None, forwards_from=None,
-                    forwards_to=dest_forwards[0].split(' ')[0] if dest_forwards else None,
-                    is_click_to_call=True,
-                    final_path=" --> ".join(path_parts),
-                    final_path_details=path_details,
-                    original_caller_name=events[0].cnam,
-                    did=events[0].did,
-                    accountcode=events[0].accountcode,
-                    userfield=events[0].userfield
+                path_details = []
+                if self.build_path_details:
+                    path_details = [{
+                        'number': src_ctc,
+                        'display': self._get_path_display(src_ctc),
+                        'type': 'source',
+                        'entity_type': self._get_path_entity_type(src_ctc, 'source'),
+                        'disposition': None,
+                    }]
+                    path_details.extend(
+                        {
+                            'number': item.split(' ')[0],
+                            'display': self._get_path_display(item.split(' ')[0]),
+                            'type': 'click_to_call_answered',
+                            'entity_type': self._get_path_entity_type(item.split(' ')[0], 'click_to_call_answered'),
+                            'disposition': 'ANSWERED',
+                        }
+                        for item in initiator_answered
+                    )
+                    path_details.append({
+                        'number': dst_ctc,
+                        'display': self._get_path_display(dst_ctc),
+                        'type': 'destination',
+                        'entity_type': self._get_path_entity_type(dst_ctc, 'destination'),
+                        'disposition': 'ANSWERED' if dst_answered else None,
+                    })
+                    path_details.extend(
+                        {
+                            'number': item.split(' ')[0],
+                            'display': self._get_path_display(item.split(' ')[0]),
+                            'type': 'forward_answered',
+                            'entity_type': self._get_path_entity_type(item.split(' ')[0], 'forward_answered'),
+                            'disposition': 'ANSWERED',
+                        }
+                        for item in dest_forwards
+                    )
+                return (
+                    events[0].timestamp,  # start_time
+                    events[0].linkedid,  # uniqueid
+                    src_ctc,  # source
+                    dst_ctc,  # destination
+                    duration_ctc,  # duration
+                    self._get_call_status(events, dispositions, has_forward,
+                                          channel_numbers, dstchannel_numbers),  # status
+                    self._get_call_direction(events, is_both_internal, trunk_in_channel, trunk_in_dstchannel),  # type
+                    is_both_internal,  # is_internal
+                    True,  # is_click_to_call
+                    " --> ".join(path_parts),  # final_path
+                    path_details,  # final_path_details
+                    events[0].cnam,  # original_caller_name
+                    None,  # transfers_from
+                    None,  # transfers_to
+                    None,  # forwards_from
+                    dest_forwards[0].split(' ')[0] if dest_forwards else None,  # forwards_to
+                    events[0].did,  # did
+                    events[0].accountcode,  # accountcode
+                    events[0].userfield,  # userfield
                 )
 
         first_event = events[0]
         if not first_event.src or not first_event.dst:
             return None
 
-        transfers_from, transfers_to, forwards_from, forwards_to, path, path_details = self._identify_actions_by_context(events)
+        transfers_to, forwards_to, path, path_details = \
+            self._identify_actions_by_context(events, channel_numbers, dstchannel_numbers)
         is_internal = self._is_internal_number(first_event.src) and self._is_internal_number(first_event.dst)
-
-        return Call(
-            start_time=first_event.timestamp,
-            uniqueid=first_event.linkedid,
-            source=first_event.src,
-            destination=first_event.dst,
-            duration=self._get_call_billsec(events, has_forward or bool(forwards_to), has_group, forwards_to),
-            status=self._get_call_status(events, dispositions, has_forward),
-            type=self._get_call_direction(events, is_internal, trunk_in_channel, trunk_in_dstchannel),
-            is_internal=is_internal,
-            transfers_from=transfers_from,
-            transfers_to=transfers_to,
-            forwards_from=forwards_from,
-            forwards_to=forwards_to,
-            final_path=path,
-            final_path_details=path_details,
-            is_click_to_call=False,
-            original_caller_name=first_event.cnam,
-            did=first_event.did,
-            accountcode=first_event.accountcode,
-            userfield=first_event.userfield
+        # Single-reference mode: status and billsec share one per-event reference test
+        # (a forwarded call's status ignores it, billsec then computes it only if needed)
+        reference_mask = (self._reference_mask(events, channel_numbers, dstchannel_numbers)
+                          if self._single_reference is not None and not has_forward else None)
+
+        return (
+            first_event.timestamp,  # start_time
+            first_event.linkedid,  # uniqueid
+            first_event.src,  # source
+            first_event.dst,  # destination
+            self._get_call_billsec(events, has_forward or bool(forwards_to), has_group, forwards_to,
+                                   channel_numbers, dstchannel_numbers, reference_mask,
+                                   forward_events),  # duration
+            self._get_call_status(events, dispositions, has_forward,
+                                  channel_numbers, dstchannel_numbers, reference_mask),  # status
+            self._get_call_direction(events, is_internal, trunk_in_channel, trunk_in_dstchannel),  # type
+            is_internal,  # is_internal
+            False,  # is_click_to_call
+            path,  # final_path
+            path_details,  # final_path_details
+            first_event.cnam,  # original_caller_name
+            None,  # transfers_from
+            transfers_to,  # transfers_to
+            None,  # forwards_from
+            forwards_to,  # forwards_to
+            first_event.did,  # did
+            first_event.accountcode,  # accountcode
+            first_event.userfield,  # userfield
         )
 
-    def process_dataframe(self, df: pd.DataFrame) -> List[Call]:
+    def process_dataframe(self, df: pd.DataFrame, workers: int = 1) -> List[Call]:
+        """Analyse chaque linkedid du DataFrame.
+
+        workers > 1 répartit les appels sur un pool de processus (au-delà de PARALLEL_MIN_CALLS).
+        Sur les plateformes en mode spawn (Windows, macOS), le script appelant doit protéger
+        son point d'entrée par ``if __name__ == '__main__':``, sans quoi chaque processus
+        du pool ré-exécute le module principal.
+        """
+        return [Call(*row) for row in self._process_rows(df, workers)]
+
+    def analyze_dataframe(self, df: pd.DataFrame, workers: int = 1) -> pd.DataFrame:
+        """Équivalent de to_dataframe(process_dataframe(df)) sans objets Call intermédiaires.
+
+        Même contrainte que process_dataframe pour workers > 1 (garde ``__main__`` en mode spawn).
+        """
+        return self._rows_to_dataframe(self._process_rows(df, workers))
+
+    def _process_rows(self, df: pd.DataFrame, workers: int = 1) -> List[tuple]:
         if df.empty:
             logger.warning("Le DataFrame est vide.")
             return []
 
-        # Determine which optional columns exist once, not per row
-        optional_cols = {col: col in df.columns
-                         for col in ('cnam', 'did', 'accountcode', 'userfield', 'amaflags', 'duration', 'clid')}
-
-        calls = []
-        # sort=False: SQL already orders by linkedid, sequence
-        for linkedid, group in df.groupby('linkedid', sort=False):
-            events = []
-            # itertuples is ~5-10x faster than iterrows for row-by-row access
-            for row in group.itertuples(index=False):
-                events.append(CallEvent(
-                    timestamp=row.calldate,
-                    uniqueid=row.uniqueid,
-                    linkedid=row.linkedid,
-                    src=row.src,
-                    dst=row.dst,
-                    channel=row.channel,
-                    dstchannel=row.dstchannel,
-                    disposition=row.disposition,
-                    cnum=row.cnum,
-                    billsec=row.billsec,
-                    sequence=row.sequence,
-                    context=row.context,
-                    lastapp=row.lastapp,
-                    cnam=getattr(row, 'cnam', None) if optional_cols['cnam'] else None,
-                    did=getattr(row, 'did', None) if optional_cols['did'] else None,
-                    accountcode=getattr(row, 'accountcode', None) if optional_cols['accountcode'] else None,
-                    userfield=getattr(row, 'userfield', None) if optional_cols['userfield'] else None,
-                    amaflags=getattr(row, 'amaflags', None) if optional_cols['amaflags'] else None,
-                    duration=getattr(row, 'duration', None) if optional_cols['duration'] else None,
-                    clid=getattr(row, 'clid', None) if optional_cols['clid'] else None,
-                ))
-            call = self.analyze_call(events)
-            if call:
-                calls.append(call)
-
-        return calls
+        # One column extraction for the whole frame instead of per-group pandas indexing;
+        # tolist() keeps Python scalars (Timestamp, int) like itertuples did, Arrow-backed
+        # columns included.
+        # Optional columns missing from the query are filled with None.
+        cdr = {
+            col: _column_values(df[col]) if col in df.columns else [None] * len(df)
+            for col in _EVENT_COLUMNS
+        }
+        # Channel numbers for the whole frame in one pass each.
+        # Series.str.extract was measured slower than the cached regex on CDR channel names.
+        cdr['channel_number'] = _channel_number_values(cdr['channel'])
+        cdr['dstchannel_number'] = _channel_number_values(cdr['dstchannel'])
+        # Rows follow CallEvent's positional order; fields with no CDR column stay None
+        missing = [None] * len(df)
+        rows = list(zip(*(cdr.get(_EVENT_SOURCE_COLUMNS.get(name, name), missing) for name in _EVENT_FIELDS)))
+
+        # Codes number the linkedids in first-appearance order (-1 for a missing linkedid).
+        # SQL orders by linkedid, sequence, so groups are normally already contiguous and
+        # sorted; otherwise one stable sort regroups them in the order groupby(sort=False)
+        # would use. With an integer sequence column the same sort also orders each call,
+        # and analyze_call skips its per-call sort.
+        codes, _ = pd.factorize(df['linkedid'])
+        sequence = df['sequence'].to_numpy() if 'sequence' in df.columns else None
+        presorted = sequence is not None and sequence.dtype.kind == 'i'
+        if ((codes < 0).any() or (np.diff(codes) < 0).any()
+                or (presorted and ((codes[1:] == codes[:-1]) & (np.diff(sequence) < 0)).any())):
+            order = np.lexsort((sequence, codes)) if presorted else np.argsort(codes, kind='stable')
+            order = order[codes[order] >= 0]
+            rows = [rows[i] for i in order.tolist()]
+            codes = codes[order]
+        if not len(codes):
+            return []
+        # Group boundaries in one pass: run i spans bounds[i]:bounds[i + 1]
+        bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True]).tolist()
+
+        runs = [rows[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        if workers > 1 and len(runs) >= self.PARALLEL_MIN_CALLS:
+            return self._analyze_runs_parallel(runs, workers, presorted)
+        return self._analyze_runs(runs, presorted)
+
+    def _analyze_runs(self, runs: List[List[tuple]], presorted: bool = False) -> List[tuple]:
+        """Construit puis analyse les CallEvent de chaque groupe de lignes."""
+        rows = []
+        for run in runs:
+            # Positional construction: no keyword matching per event
+            events = list(starmap(CallEvent, run))
+            row = self.analyze_call_to_row(events, presorted)
+            if row:
+                rows.append(row)
+
+        return rows
+
+    def _analyze_runs_parallel(self, runs: List[List[tuple]], workers: int,
+                               presorted: bool = False) -> List[tuple]:
+        # Contiguous chunks keep the calls in input order once flattened; a few chunks
+        # per worker balance uneven call sizes
+        chunk_size = -(-len(runs) // (workers * 4))
+        chunks = [runs[i:i + chunk_size] for i in range(0, len(runs), chunk_size)]
+        init_args = (self.internal_numbers, self.reference_numbers, self.ring_group_numbers,
+                     self.extension_numbers, self.display_names, self.build_path_details)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(init_args,)) as executor:
+            return [row for rows in executor.map(_analyze_runs_in_worker, chunks, repeat(presorted)) for row in rows]
 
     def to_dataframe(self, calls: List[Call]) -> pd.DataFrame:
-        if not calls:
+        return self._rows_to_dataframe(list(map(attrgetter(*_CALL_FIELDS), calls)))
+
+    @staticmethod
+    def _rows_to_dataframe(rows: List[tuple]) -> pd.DataFrame:
+        if not rows:
             return pd.DataFrame()
 
-        data = [{
-            'call_date': call.start_time,
-            'uniqueid': call.uniqueid,
-            'src': call.source,
-            'dst': call.destination,
-            'billsec': call.duration,
-            'status': call.status,
-            'answered': call.status == 'ANSWERED',
-            'type_appel': call.type,
-            'is_internal': call.is_internal,
-            'renvoi_vers': call.forwards_to,
-            'path': call.final_path,
-            'path_details': call.final_path_details,
-            'is_click_to_call': call.is_click_to_call,
-            'original_caller_name': call.original_caller_name,
-            'did': call.did,
-            'accountcode': call.accountcode,
-            'userfield': call.userfield,
-        } for call in calls]
-
-        df = pd.DataFrame(data)
-        df['call_date'] = pd.to_datetime(df['call_date'])
+        # One transpose into column lists: no record-to-column work in pandas
+        fields = dict(zip(_CALL_FIELDS, map(list, zip(*rows))))
+        statuses = fields['status']
+        df = pd.DataFrame({
+            # Typed columns are built in place rather than converted after construction
+            'call_date': pd.to_datetime(fields['start_time']),
+            'uniqueid': fields['uniqueid'],
+            'src': fields['source'],
+            'dst': fields['destination'],
+            'billsec': fields['duration'],
+            # A handful of distinct values repeated on every row
+            'status': pd.Categorical(statuses),
+            'answered': [status == 'ANSWERED' for status in statuses],
+            'type_appel': pd.Categorical(fields['type']),
+            'is_internal': fields['is_internal'],
+            'renvoi_vers': fields['forwards_to'],
+            'path': fields['final_path'],
+            'path_details': fields['final_path_details'],
+            'is_click_to_call': fields['is_click_to_call'],
+            'original_caller_name': fields['original_caller_name'],
+            'did': fields['did'],
+            'accountcode': fields['accountcode'],
+            'userfield': fields['userfield'],
+        })
         # Vectorised end_date — avoids a timedelta() per row in the comprehension
         df['end_date'] = df['call_date'] + pd.to_timedelta(df['billsec'], unit='s')
         return df
+
+
+# One analyzer per worker process, built once by the pool initializer
+_worker_analyzer: Optional[CallAnalyzer] = None
+
+
+def _init_worker(init_args: tuple) -> None:
+    global _worker_analyzer
+    _worker_analyzer = CallAnalyzer(*init_args)
+
+
+def _analyze_runs_in_worker(runs: List[List[tuple]], presorted: bool) -> List[tuple]:
+    return _worker_analyzer._analyze_runs(runs, presorted)
@@ -1,10 +1,100 @@
 import logging
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# type_appel values; their position + 1 is the type axis of the statistics bins (0: anything else)
+_CALL_TYPES = ('entrant', 'sortant', 'interne')
+_TYPE_ENTRANT = 1
+_TYPE_SORTANT = 2
+# type x answered x is_internal x renvoi x click-to-call
+_KEY_SHAPE = (len(_CALL_TYPES) + 1, 2, 2, 2, 2)
+_KEY_BINS = int(np.prod(_KEY_SHAPE))
+
+# Statistics of a period without any call; get_empty_statistics returns copies
+_EMPTY_STATISTICS: Dict[str, int] = {
+    'nb_appels_total': 0, 'nb_appels_recus': 0, 'nb_appels_emis': 0,
+    'nb_appels_internes': 0, 'nb_appel_interne_emis': 0, 'nb_appel_interne_recus': 0,
+    'nb_appels_manques': 0, 'nb_appels_externes_manques': 0,
+    'nb_appels_internes_manques': 0, 'nb_appels_internes_repondus': 0,
+    'nb_appels_aboutis': 0, 'nb_appels_externes_aboutis': 0, 'nb_appels_internes_aboutis': 0,
+    'duree_appels_total': 0,
+    'duree_appels_recus': 0, 'duree_appels_internes_recus': 0, 'duree_appels_externes_recus': 0,
+    'duree_appels_emis': 0, 'duree_appels_internes_emis': 0, 'duree_appels_externes_emis': 0,
+    'duree_moyenne_appels': 0, 'duree_moyenne_appels_internes': 0, 'duree_moyenne_appels_externes': 0,
+    'nb_renvois_appels_recus': 0, 'duree_renvois_appels_recus': 0,
+    'nb_renvois_appels_emis': 0, 'duree_renvois_appels_emis': 0,
+    'nb_click_to_call': 0,
+}
+
+
+def _call_type_codes(call_types: pd.Series) -> np.ndarray:
+    """Code entier de type_appel par appel (1 entrant, 2 sortant, 3 interne, 0 sinon)."""
+    # Categorical input (the analyser's output) is recoded from its codes, without string compares
+    return pd.Categorical(call_types, categories=_CALL_TYPES).codes.astype(np.intp) + 1
+
+
+# duree_moyenne is the mean billsec of the calls that lasted: aggregated as a plain sum and
+# count (vectorised reductions) rather than a per-group lambda, then divided once per group
+_POSITIVE_BILLSEC_AGGREGATIONS = {
+    'duree_positive': ('billsec_positive', 'sum'),
+    'nb_positifs': ('has_billsec', 'sum'),
+}
+
+
+def _bucket_totals(buckets: np.ndarray, n_buckets: int, df: pd.DataFrame, rows: np.ndarray,
+                   **flags: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Totaux par tranche (heure, jour...) des lignes retenues, pour les tranches non vides.
+
+    buckets donne la tranche (0 <= tranche < n_buckets) de chaque ligne retenue par le masque rows ;
+    flags sont des colonnes booléennes supplémentaires, déjà filtrées, à compter par tranche.
+    """
+    billsec = df['billsec'].to_numpy(dtype=np.int64)[rows]
+    has_billsec = billsec > 0
+
+    def per_bucket(weights=None) -> np.ndarray:
+        return np.bincount(buckets, weights=weights, minlength=n_buckets)
+
+    calls = per_bucket(df['uniqueid'].notna().to_numpy()[rows])
+    present = np.flatnonzero(per_bucket() > 0)
+    positive_count = per_bucket(has_billsec)[present]
+    positive_total = per_bucket(np.where(has_billsec, billsec, 0))[present]
+    mean = np.divide(positive_total, positive_count, out=np.zeros(len(present)), where=positive_count > 0)
+
+    totals = {
+        'nb_appels': calls[present].astype(np.int64),
+        'nb_appels_repondus': per_bucket(df['answered'].to_numpy(dtype=bool)[rows])[present].astype(np.int64),
+        'duree_totale': per_bucket(billsec)[present].astype(np.int64),
+        'duree_moyenne': mean.round(0).astype(np.int64),
+    }
+    for name, flag in flags.items():
+        totals[name] = per_bucket(flag)[present].astype(np.int64)
+    return present, totals
+
+
+def _grouped_call_frame(df: pd.DataFrame, **columns) -> pd.DataFrame:
+    """Colonnes agrégées par les statistiques groupées, plus les éventuelles colonnes fournies."""
+    billsec = df['billsec']
+    has_billsec = billsec > 0
+    return pd.DataFrame({
+        'uniqueid': df['uniqueid'],
+        'answered': df['answered'],
+        'billsec': billsec,
+        'billsec_positive': billsec.where(has_billsec, 0),
+        'has_billsec': has_billsec,
+        **columns,
+    })
+
+
+def _mean_positive_billsec(stats: pd.DataFrame) -> pd.Series:
+    """Retire les colonnes de _POSITIVE_BILLSEC_AGGREGATIONS et renvoie la durée moyenne arrondie."""
+    total = stats.pop('duree_positive')
+    count = stats.pop('nb_positifs')
+    return (total / count.where(count > 0)).fillna(0).round(0).astype(int)
+
 
 class StatisticsGenerator:
     """Génère des statistiques à partir des données d'appels."""
@@ -15,154 +105,179 @@ class StatisticsGenerator:
         if df.empty:
             return StatisticsGenerator.get_empty_statistics()
 
+        # One integer key per call packs the five flags every statistic depends on; a single
+        # bincount then gives each bin's call count and billsec total, and every statistic
+        # is a sum over bins instead of its own pass over the columns
+        type_code = _call_type_codes(df['type_appel'])
+        key = ((type_code << 4)
+               | (df['answered'].to_numpy(dtype=bool).astype(np.intp) << 3)
+               | (df['is_internal'].to_numpy(dtype=bool).astype(np.intp) << 2)
+               | (df['renvoi_vers'].notna().to_numpy().astype(np.intp) << 1)
+               | df['is_click_to_call'].to_numpy(dtype=bool).astype(np.intp))
+        # Axes: type (autre, entrant, sortant, interne), answered, is_internal, renvoi, click-to-call
+        counts = np.bincount(key, minlength=_KEY_BINS).reshape(_KEY_SHAPE)
+        sums = np.bincount(key, weights=df['billsec'].to_numpy(dtype=np.float64),
+                           minlength=_KEY_BINS).reshape(_KEY_SHAPE)
+
         if not reference_numbers:
-            df = df[~df['is_internal']]
+            # Internal calls are left out of the statistics when no reference number is set
+            counts = counts[:, :, :1]
+            sums = sums[:, :, :1]
 
-        if df.empty:
+        if not counts.any():
             return StatisticsGenerator.get_empty_statistics()
 
-        # Pre-compute boolean masks once — each mask reused many times below
-        answered = df['answered']
-        entrant = df['type_appel'] == 'entrant'
-        sortant = df['type_appel'] == 'sortant'
-        internal = df['is_internal']
-        not_internal = ~internal
-        not_answered = ~answered
-        has_forward = df['renvoi_vers'].notna()
+        entrant, sortant = _TYPE_ENTRANT, _TYPE_SORTANT
+        counts_internal = counts[:, :, 1:]
+        counts_external = counts[:, :, :1]
+        sums_internal = sums[:, :, 1:]
+        sums_external = sums[:, :, :1]
 
-        billsec = df['billsec']
+        def _total(bins) -> int:
+            return int(bins.sum())
 
-        def _mean_billsec(mask) -> int:
-            vals = billsec[mask & answered]
-            return int(vals.mean()) if len(vals) > 0 else 0
+        def _mean_billsec(count_bins, sum_bins) -> int:
+            # Mean billsec of the answered calls among the given bins; billsec totals are whole
+            # seconds, so the truncated mean is an exact integer division
+            nb = int(count_bins[:, 1].sum())
+            return int(sum_bins[:, 1].sum()) // nb if nb else 0
 
         return {
-            'nb_appels_total': len(df),
-            'nb_appels_recus': int(entrant.sum()),
-            'nb_appels_emis': int(sortant.sum()),
+            'nb_appels_total': _total(counts),
+            'nb_appels_recus': _total(counts[entrant]),
+            'nb_appels_emis': _total(counts[sortant]),
 
-            'nb_appels_internes': int(internal.sum()),
-            'nb_appel_interne_emis': int((sortant & internal).sum()),
-            'nb_appel_interne_recus': int((entrant & internal).sum()),
+            'nb_appels_internes': _total(counts_internal),
+            'nb_appel_interne_emis': _total(counts_internal[sortant]),
+            'nb_appel_interne_recus': _total(counts_internal[entrant]),
 
-            'nb_appels_manques': int((entrant & not_answered).sum()),
-            'nb_appels_externes_manques': int((entrant & not_answered & not_internal).sum()),
-            'nb_appels_internes_manques': int((entrant & not_answered & internal).sum()),
-            'nb_appels_internes_repondus': int((entrant & answered & internal).sum()),
+            'nb_appels_manques': _total(counts[entrant, 0]),
+            'nb_appels_externes_manques': _total(counts_external[entrant, 0]),
+            'nb_appels_internes_manques': _total(counts_internal[entrant, 0]),
+            'nb_appels_internes_repondus': _total(counts_internal[entrant, 1]),
 
-            'nb_appels_aboutis': int((sortant & answered).sum()),
-            'nb_appels_externes_aboutis': int((sortant & answered & not_internal).sum()),
-            'nb_appels_internes_aboutis': int((sortant & answered & internal).sum()),
+            'nb_appels_aboutis': _total(counts[sortant, 1]),
+            'nb_appels_externes_aboutis': _total(counts_external[sortant, 1]),
+            'nb_appels_internes_aboutis': _total(counts_internal[sortant, 1]),
 
-            'duree_appels_total': int(billsec.sum()),
+            'duree_appels_total': _total(sums),
 
-            'duree_appels_recus': int(billsec[entrant].sum()),
-            'duree_appels_internes_recus': int(billsec[entrant & internal].sum()),
-            'duree_appels_externes_recus': int(billsec[entrant & not_internal].sum()),
+            'duree_appels_recus': _total(sums[entrant]),
+            'duree_appels_internes_recus': _total(sums_internal[entrant]),
+            'duree_appels_externes_recus': _total(sums_external[entrant]),
 
-            'duree_appels_emis': int(billsec[sortant].sum()),
-            'duree_appels_internes_emis': int(billsec[sortant & internal].sum()),
-            'duree_appels_externes_emis': int(billsec[sortant & not_internal].sum()),
+            'duree_appels_emis': _total(sums[sortant]),
+            'duree_appels_internes_emis': _total(sums_internal[sortant]),
+            'duree_appels_externes_emis': _total(sums_external[sortant]),
 
-            'duree_moyenne_appels': int(billsec[answered].mean()) if answered.any() else 0,
-            'duree_moyenne_appels_internes': _mean_billsec(internal),
-            'duree_moyenne_appels_externes': _mean_billsec(not_internal),
+            'duree_moyenne_appels': _mean_billsec(counts, sums),
+            'duree_moyenne_appels_internes': _mean_billsec(counts_internal, sums_internal),
+            'duree_moyenne_appels_externes': _mean_billsec(counts_external, sums_external),
 
-            'nb_renvois_appels_recus': int((entrant & has_forward).sum()),
-            'duree_renvois_appels_recus': int(billsec[entrant & has_forward].sum()),
+            'nb_renvois_appels_recus': _total(counts[entrant, :, :, 1]),
+            'duree_renvois_appels_recus': _total(sums[entrant, :, :, 1]),
 
-            'nb_renvois_appels_emis': int((sortant & has_forward).sum()),
-            'duree_renvois_appels_emis': int(billsec[sortant & has_forward].sum()),
+            'nb_renvois_appels_emis': _total(counts[sortant, :, :, 1]),
+            'duree_renvois_appels_emis': _total(sums[sortant, :, :, 1]),
 
-            'nb_click_to_call': int(df['is_click_to_call'].sum()),
+            'nb_click_to_call': _total(counts[..., 1]),
         }
 
     @staticmethod
     def get_empty_statistics() -> Dict[str, int]:
-        return {
-            'nb_appels_total': 0, 'nb_appels_recus': 0, 'nb_appels_emis': 0,
-            'nb_appels_internes': 0, 'nb_appel_interne_emis': 0, 'nb_appel_interne_recus': 0,
-            'nb_appels_manques': 0, 'nb_appels_externes_manques': 0,
-            'nb_appels_internes_manques': 0, 'nb_appels_internes_repondus': 0,
-            'nb_appels_aboutis': 0, 'nb_appels_externes_aboutis': 0, 'nb_appels_internes_aboutis': 0,
-            'duree_appels_total': 0,
-            'duree_appels_recus': 0, 'duree_appels_internes_recus': 0, 'duree_appels_externes_recus': 0,
-            'duree_appels_emis': 0, 'duree_appels_internes_emis': 0, 'duree_appels_externes_emis': 0,
-            'duree_moyenne_appels': 0, 'duree_moyenne_appels_internes': 0, 'duree_moyenne_appels_externes': 0,
-            'nb_renvois_appels_recus': 0, 'duree_renvois_appels_recus': 0,
-            'nb_renvois_appels_emis': 0, 'duree_renvois_appels_emis': 0,
-            'nb_click_to_call': 0,
-        }
+        # Callers may fill in or tweak the result: hand out a copy of the shared template
+        return dict(_EMPTY_STATISTICS)
 
     @staticmethod
     def calculate_hourly_statistics(df: pd.DataFrame) -> pd.DataFrame:
         if df.empty:
             return pd.DataFrame()
 
-        # Group directly on the dt accessor — no copy needed
-        hourly = df.groupby(df['call_date'].dt.hour).agg(
-            nb_appels=('uniqueid', 'count'),
-            nb_appels_repondus=('answered', 'sum'),
-            duree_totale=('billsec', 'sum'),
-            duree_moyenne=('billsec', lambda x: x[x > 0].mean() if len(x[x > 0]) > 0 else 0)
-        ).reset_index().rename(columns={'call_date': 'hour'})
-
-        hourly['duree_moyenne'] = hourly['duree_moyenne'].round(0).astype(int)
-        return hourly
+        # 24 dense keys: bincount per hour instead of a hashed groupby
+        call_dates = df['call_date']
+        dated = call_dates.notna().to_numpy()
+        hours = call_dates.dt.hour.to_numpy()[dated].astype(np.intp)
+        present, totals = _bucket_totals(hours, 24, df, dated)
+        return pd.DataFrame({
+            'hour': present.astype(np.int32),
+            'nb_appels': totals['nb_appels'],
+            'nb_appels_repondus': totals['nb_appels_repondus'],
+            'duree_totale': totals['duree_totale'],
+            'duree_moyenne': totals['duree_moyenne'],
+        })
 
     @staticmethod
     def calculate_daily_statistics(df: pd.DataFrame) -> pd.DataFrame:
         if df.empty:
             return pd.DataFrame()
 
-        daily = df.groupby(df['call_date'].dt.date).agg(
-            nb_appels=('uniqueid', 'count'),
-            nb_appels_recus=('type_appel', lambda x: (x == 'entrant').sum()),
-            nb_appels_emis=('type_appel', lambda x: (x == 'sortant').sum()),
-            nb_appels_repondus=('answered', 'sum'),
-            duree_totale=('billsec', 'sum'),
-            duree_moyenne=('billsec', lambda x: x[x > 0].mean() if len(x[x > 0]) > 0 else 0)
-        ).reset_index().rename(columns={'call_date': 'date'})
-
-        daily['duree_moyenne'] = daily['duree_moyenne'].round(0).astype(int)
-        return daily
+        call_dates = df['call_date']
+        if call_dates.dt.tz is not None:
+            # Bucket on the local calendar day, as dt.date does
+            call_dates = call_dates.dt.tz_localize(None)
+        dated = call_dates.notna().to_numpy()
+        # Integer day numbers instead of datetime.date objects; offset from the first day so the
+        # calendar days of the period are dense bincount buckets
+        days = call_dates.to_numpy(dtype='datetime64[ns]')[dated].astype('datetime64[D]').astype(np.int64)
+        first_day = days.min() if len(days) else 0
+        days -= first_day
+
+        # Per-call direction flags built once from the type codes, then summed per day
+        type_code = _call_type_codes(df['type_appel'])[dated]
+        present, totals = _bucket_totals(days, int(days.max()) + 1 if len(days) else 0, df, dated,
+                                         entrant=type_code == _TYPE_ENTRANT, sortant=type_code == _TYPE_SORTANT)
+        return pd.DataFrame({
+            'date': (present + first_day).astype('datetime64[D]').astype(object),
+            'nb_appels': totals['nb_appels'],
+            'nb_appels_recus': totals['entrant'],
+            'nb_appels_emis': totals['sortant'],
+            'nb_appels_repondus': totals['nb_appels_repondus'],
+            'duree_totale': totals['duree_totale'],
+            'duree_moyenne': totals['duree_moyenne'],
+        })
 
     @staticmethod
     def top_destinations(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
         if df.empty:
             return pd.DataFrame()
 
-        df_out = df[df['type_appel'] == 'sortant']
-        if df_out.empty:
+        # Project to the aggregated columns before filtering: the mask then copies those only
+        calls = _grouped_call_frame(df, dst=df['dst'])[_call_type_codes(df['type_appel']) == _TYPE_SORTANT]
+        if calls.empty:
             return pd.DataFrame()
 
-        top = df_out.groupby('dst').agg(
+        top = calls.groupby('dst').agg(
             nb_appels=('uniqueid', 'count'),
             nb_repondus=('answered', 'sum'),
             duree_totale=('billsec', 'sum'),
-            duree_moyenne=('billsec', lambda x: x[x > 0].mean() if len(x[x > 0]) > 0 else 0)
+            **_POSITIVE_BILLSEC_AGGREGATIONS,
         ).reset_index()
 
+        # Keep the top_n rows first, then derive the ratio columns on that slice only
+        top = top.nlargest(top_n, 'nb_appels')
+        top['duree_moyenne'] = _mean_positive_billsec(top)
         top['taux_reponse'] = (top['nb_repondus'] / top['nb_appels'] * 100).round(1)
-        top['duree_moyenne'] = top['duree_moyenne'].round(0).astype(int)
-        return top.sort_values('nb_appels', ascending=False).head(top_n)
+        return top
 
     @staticmethod
     def top_sources(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
         if df.empty:
             return pd.DataFrame()
 
-        df_in = df[df['type_appel'] == 'entrant']
-        if df_in.empty:
+        # Project to the aggregated columns before filtering: the mask then copies those only
+        calls = _grouped_call_frame(df, src=df['src'])[_call_type_codes(df['type_appel']) == _TYPE_ENTRANT]
+        if calls.empty:
             return pd.DataFrame()
 
-        top = df_in.groupby('src').agg(
+        top = calls.groupby('src').agg(
             nb_appels=('uniqueid', 'count'),
             nb_repondus=('answered', 'sum'),
             duree_totale=('billsec', 'sum'),
-            duree_moyenne=('billsec', lambda x: x[x > 0].mean() if len(x[x > 0]) > 0 else 0)
+            **_POSITIVE_BILLSEC_AGGREGATIONS,
         ).reset_index()
 
+        # Keep the top_n rows first, then derive the ratio columns on that slice only
+        top = top.nlargest(top_n, 'nb_appels')
+        top['duree_moyenne'] = _mean_positive_billsec(top)
         top['taux_reponse'] = (top['nb_repondus'] / top['nb_appels'] * 100).round(1)
-        top['duree_moyenne'] = top['duree_moyenne'].round(0).astype(int)
-        return top.sort_values('nb_appels', ascending=False).head(top_n)
+        return top
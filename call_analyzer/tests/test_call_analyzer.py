@@ -3,6 +3,7 @@ from unittest import TestCase
 
 import pandas as pd
 
+from call_analyzer.infrastructure.db_connector import DatabaseConnector
 from call_analyzer.services.call_analyzer import CallAnalyzer
 
 
@@ -488,3 +489,53 @@ class CallAnalyzerTest(TestCase):
                 ('0666828301', None, 'forwarded', 'external', 'NO ANSWER'),
             ],
         )
+
+    def test_sql_nulls_in_categorical_columns_reach_the_analysis_as_none(self):
+        df = pd.DataFrame([
+            {
+                'calldate': datetime(2026, 5, 12, 12, 0, 0),
+                'uniqueid': 'call-9.1',
+                'linkedid': 'call-9',
+                'src': '0123456789',
+                'dst': '163',
+                'channel': 'PJSIP/trunk-in-00000001',
+                'dstchannel': 'PJSIP/163-00000002',
+                'disposition': 'ANSWERED',
+                'cnum': '0123456789',
+                'billsec': 12,
+                'sequence': 1,
+                'context': None,
+                'lastapp': None,
+                'accountcode': None,
+            },
+            {
+                'calldate': datetime(2026, 5, 12, 12, 5, 0),
+                'uniqueid': 'call-10.1',
+                'linkedid': 'call-10',
+                'src': '163',
+                'dst': '0612345678',
+                'channel': 'PJSIP/163-00000003',
+                'dstchannel': 'PJSIP/trunk-out-00000004',
+                'disposition': None,
+                'cnum': '163',
+                'billsec': 0,
+                'sequence': 1,
+                'context': 'from-internal',
+                'lastapp': 'Dial',
+                'accountcode': 'compta',
+            },
+        ])
+        # DatabaseConnector stores these columns as category; NULLs then come out of tolist() as NaN
+        df = DatabaseConnector._to_categorical(df)
+
+        analyzer = CallAnalyzer(internal_numbers={'163'}, extension_numbers={'163'})
+        calls = analyzer.process_dataframe(df)
+        result = analyzer.analyze_dataframe(df)
+
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(calls[0].accountcode)
+        self.assertEqual(calls[1].accountcode, 'compta')
+        self.assertEqual(calls[0].status, 'ANSWERED')
+        self.assertEqual(calls[1].status, 'FAILED')
+        self.assertIsNone(result.iloc[0]['accountcode'])
+        self.assertEqual(result.iloc[1]['accountcode'], 'compta')
@@ -0,0 +1,120 @@
+import random
+from datetime import datetime, timedelta
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+
+from call_analyzer.services.call_analyzer import CallAnalyzer
+
+
+def build_cdr_frame(n_calls: int = 60, seed: int = 7) -> pd.DataFrame:
+    """Synthetic CDR rows covering incoming, outgoing, internal, ring-group and forwarded calls."""
+    rnd = random.Random(seed)
+    rows = []
+    base = datetime(2026, 5, 4, 8)
+    for k in range(n_calls):
+        linkedid = f'call-{k}'
+        start = base + timedelta(minutes=41 * k)
+        kind = rnd.choice(['in', 'out', 'int', 'group', 'fwd'])
+        ext = rnd.choice(['101', '102', '163'])
+        other_ext = rnd.choice(['101', '102', '130'])
+        external = '06' + ''.join(rnd.choice('0123456789') for _ in range(8))
+        disposition = rnd.choice(['ANSWERED', 'NO ANSWER', 'BUSY', 'ANSWERED'])
+        billsec = rnd.randint(1, 300) if disposition == 'ANSWERED' else 0
+
+        def add(seq, src, dst, channel, dstchannel, context, disp=disposition, bill=billsec):
+            rows.append({
+                'calldate': start + timedelta(seconds=seq), 'uniqueid': f'{linkedid}.{seq}', 'linkedid': linkedid,
+                'src': src, 'dst': dst, 'channel': channel, 'dstchannel': dstchannel, 'disposition': disp,
+                'cnum': src, 'billsec': bill, 'sequence': seq, 'context': context, 'lastapp': 'Dial',
+            })
+
+        if kind == 'in':
+            add(1, external, ext, 'PJSIP/trunk-in-0001', f'PJSIP/{ext}-0002', 'from-trunk')
+        elif kind == 'out':
+            add(1, ext, external, f'PJSIP/{ext}-0001', 'PJSIP/trunk-out-0002', 'from-internal')
+        elif kind == 'int':
+            add(1, ext, other_ext, f'PJSIP/{ext}-0001', f'PJSIP/{other_ext}-0002', 'from-internal')
+        elif kind == 'group':
+            add(1, external, '600', 'PJSIP/trunk-in-0001', 'Local/600@from-trunk-0002;1', 'from-trunk', bill=0)
+            add(2, external, '600', 'Local/600@ext-group-0002;2', f'Local/{ext}@from-internal-0003;1', 'ext-group')
+            add(3, external, '600', 'Local/600@ext-group-0002;2', f'Local/{other_ext}@from-internal-0004;1',
+                'ext-group', disp='NO ANSWER', bill=0)
+        else:
+            add(1, external, '163', 'PJSIP/trunk-in-0001', 'Local/163@from-trunk-0002;1', 'from-trunk', bill=0)
+            add(2, '163', external, f'Local/{external}@from-internal-0003;1', '', 'from-internal', bill=0)
+            add(3, '163', external, 'PJSIP/163-0004', 'PJSIP/trunk-out-0005', 'outbound-allroutes')
+    return pd.DataFrame(rows)
+
+
+def reference_analysis(analyzer: CallAnalyzer, df: pd.DataFrame) -> pd.DataFrame:
+    """Plain groupby reference: one already ordered frame per linkedid, in first-appearance order."""
+    frames = [
+        analyzer.analyze_dataframe(group.sort_values('sequence', kind='stable'))
+        for _, group in df.groupby('linkedid', sort=False)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+class CallGroupingTest(TestCase):
+    def setUp(self):
+        self.analyzer = CallAnalyzer(
+            internal_numbers={'101', '102', '130', '163', '600'},
+            ring_group_numbers={'600'},
+            extension_numbers={'101', '102', '130', '163'},
+            display_names={'101': 'Alice', '600': 'Support'},
+        )
+        self.df = build_cdr_frame()
+
+    def assertSameAnalysis(self, result: pd.DataFrame, expected: pd.DataFrame):
+        # Per-call frames concatenated with different categories fall back to object
+        def plain(frame):
+            categorical = frame.select_dtypes('category').columns
+            return frame.astype({col: object for col in categorical}).reset_index(drop=True)
+        pd.testing.assert_frame_equal(plain(result), plain(expected))
+
+    def test_sorted_frame_matches_groupby_reference(self):
+        self.assertSameAnalysis(self.analyzer.analyze_dataframe(self.df), reference_analysis(self.analyzer, self.df))
+
+    def test_shuffled_rows_match_groupby_reference(self):
+        # Linkedids non-contiguous and events out of sequence order within each call
+        shuffled = self.df.sample(frac=1, random_state=3).reset_index(drop=True)
+        self.assertSameAnalysis(self.analyzer.analyze_dataframe(shuffled),
+                                reference_analysis(self.analyzer, shuffled))
+
+    def test_interleaved_linkedids_keep_first_appearance_order(self):
+        # Contiguous blocks in reverse linkedid order, each block in reverse sequence order
+        reordered = self.df.iloc[::-1].reset_index(drop=True)
+        result = self.analyzer.analyze_dataframe(reordered)
+        self.assertSameAnalysis(result, reference_analysis(self.analyzer, reordered))
+        self.assertEqual(result['uniqueid'].iloc[0], reordered['linkedid'].iloc[0])
+
+    def test_missing_linkedids_are_dropped_like_groupby(self):
+        with_missing = self.df.sample(frac=1, random_state=5).reset_index(drop=True)
+        with_missing.loc[with_missing.index[::7], 'linkedid'] = np.nan
+        result = self.analyzer.analyze_dataframe(with_missing)
+        self.assertSameAnalysis(result, reference_analysis(self.analyzer, with_missing))
+        self.assertFalse(result['uniqueid'].isna().any())
+
+    def test_non_integer_sequence_still_groups_calls(self):
+        as_float = self.df.sample(frac=1, random_state=11).reset_index(drop=True)
+        as_float['sequence'] = as_float['sequence'].astype(float)
+        self.assertSameAnalysis(self.analyzer.analyze_dataframe(as_float),
+                                reference_analysis(self.analyzer, as_float))
+
+    def test_process_dataframe_matches_analyze_dataframe(self):
+        shuffled = self.df.sample(frac=1, random_state=13).reset_index(drop=True)
+        calls = self.analyzer.process_dataframe(shuffled)
+        self.assertSameAnalysis(self.analyzer.to_dataframe(calls), self.analyzer.analyze_dataframe(shuffled))
+
+    def test_worker_pool_matches_single_process(self):
+        shuffled = self.df.sample(frac=1, random_state=17).reset_index(drop=True)
+        expected = self.analyzer.analyze_dataframe(shuffled, workers=1)
+        # Lowered threshold so the small fixture goes through the process pool
+        self.analyzer.PARALLEL_MIN_CALLS = 1
+        with mock.patch.object(self.analyzer, '_analyze_runs_parallel',
+                               wraps=self.analyzer._analyze_runs_parallel) as parallel:
+            result = self.analyzer.analyze_dataframe(shuffled, workers=2)
+        parallel.assert_called_once()
+        pd.testing.assert_frame_equal(result, expected)
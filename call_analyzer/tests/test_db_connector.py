@@ -0,0 +1,20 @@
+from unittest import TestCase, mock
+
+from call_analyzer.infrastructure import db_connector
+from call_analyzer.infrastructure.db_connector import DatabaseConnector
+
+
+def connector(**kwargs) -> DatabaseConnector:
+    # The engine connects lazily: building a connector never reaches the server
+    return DatabaseConnector('u', 'p', 'asteriskcdrdb', 'localhost', '3306', **kwargs)
+
+
+class DtypeBackendTest(TestCase):
+    def test_pyarrow_backend_without_pyarrow_fails_at_construction(self):
+        with mock.patch.object(db_connector, 'find_spec', return_value=None), \
+                self.assertRaisesRegex(ImportError, 'pyarrow'):
+            connector(dtype_backend='pyarrow')
+
+    def test_default_backend_does_not_need_pyarrow(self):
+        with mock.patch.object(db_connector, 'find_spec', return_value=None):
+            self.assertIsNone(connector().dtype_backend)
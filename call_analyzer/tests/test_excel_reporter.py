@@ -0,0 +1,163 @@
+import os
+import sys
+import tempfile
+from unittest import TestCase, mock, skipUnless
+
+import pandas as pd
+
+from call_analyzer.infrastructure.excel_reporter import ExcelExporter
+from call_analyzer.services.app import CDRAnalyzerApp
+from call_analyzer.services.call_analyzer import CallAnalyzer
+from call_analyzer.tests.test_call_grouping import build_cdr_frame
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+INTERNAL_NUMBERS = {'101', '102', '130', '163', '600'}
+EXTENSIONS = {'101': 'Alice', '600': 'Support'}
+
+
+def analysed_calls() -> pd.DataFrame:
+    analyzer = CallAnalyzer(
+        internal_numbers=INTERNAL_NUMBERS,
+        ring_group_numbers={'600'},
+        extension_numbers={'101', '102', '130', '163'},
+        display_names=EXTENSIONS,
+    )
+    return analyzer.analyze_dataframe(build_cdr_frame())
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp_path = tmp.name
+        self.df = analysed_calls()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp_path, name)
+
+    def assertOnlyFiles(self, *names: str):
+        self.assertEqual(sorted(os.listdir(self.tmp_path)), sorted(names))
+
+
+class ExcelCallsExportTest(ExportTestCase):
+    def test_short_list_keeps_the_requested_name(self):
+        files = ExcelExporter.export_calls_to_excel_files(self.df, self.path('appels.xlsx'), EXTENSIONS)
+        self.assertEqual(files, [self.path('appels.xlsx')])
+        self.assertOnlyFiles('appels.xlsx')
+        self.assertEqual(len(pd.read_excel(files[0], sheet_name='Appels')), len(self.df))
+
+    def test_long_list_is_split_with_numbered_suffixes(self):
+        max_rows = 25
+        files = ExcelExporter.export_calls_to_excel_files(self.df, self.path('appels.xlsx'), EXTENSIONS,
+                                                          max_rows=max_rows)
+        n_files = -(-len(self.df) // max_rows)
+        names = [f'appels_{part}.xlsx' for part in range(1, n_files + 1)]
+        self.assertEqual(files, [self.path(name) for name in names])
+        self.assertOnlyFiles(*names)
+
+        parts = [pd.read_excel(file, sheet_name='Appels', dtype={'Source': str}) for file in files]
+        self.assertEqual([len(part) for part in parts[:-1]], [max_rows] * (n_files - 1))
+        self.assertEqual(sum(map(len, parts)), len(self.df))
+        # Parts follow each other in the frame order
+        self.assertEqual(pd.concat(parts)['Source'].tolist(), self.df['src'].tolist())
+
+    def test_exact_multiple_gives_no_empty_part(self):
+        files = ExcelExporter.export_calls_to_excel_files(self.df, self.path('appels.xlsx'), EXTENSIONS,
+                                                          max_rows=len(self.df) // 2)
+        self.assertEqual(files, [self.path('appels_1.xlsx'), self.path('appels_2.xlsx')])
+
+    def test_max_rows_outside_the_sheet_limits_is_rejected(self):
+        for max_rows in (0, -1, ExcelExporter.EXCEL_MAX_DATA_ROWS + 1):
+            with self.subTest(max_rows=max_rows), self.assertRaisesRegex(ValueError, 'lignes par fichier'):
+                ExcelExporter.export_calls_to_excel_files(self.df, self.path('appels.xlsx'), max_rows=max_rows)
+        self.assertOnlyFiles()
+
+    def test_sheet_limit_is_accepted(self):
+        files = ExcelExporter.export_calls_to_excel_files(self.df, self.path('appels.xlsx'),
+                                                          max_rows=ExcelExporter.EXCEL_MAX_DATA_ROWS)
+        self.assertEqual(files, [self.path('appels.xlsx')])
+
+    def test_default_is_read_when_the_export_runs(self):
+        with mock.patch.object(ExcelExporter, 'MAX_ROWS_PER_FILE', 25):
+            files = ExcelExporter.export_calls_to_excel_files(self.df, self.path('appels.xlsx'))
+        self.assertEqual(len(files), -(-len(self.df) // 25))
+
+    def test_durations_are_excel_time_values(self):
+        ExcelExporter.export_calls_to_excel(self.df, self.path('appels.xlsx'), EXTENSIONS)
+        durations = pd.read_excel(self.path('appels.xlsx'), sheet_name='Appels')['Durée']
+        # [h]:mm:ss cells come back as timedeltas
+        self.assertEqual(durations.dt.total_seconds().round().astype(int).tolist(), self.df['billsec'].tolist())
+
+
+@skipUnless(pyarrow is not None, 'pyarrow is not installed')
+class ParquetCallsExportTest(ExportTestCase):
+    def test_calls_are_written_with_a_duration_column(self):
+        filename = ExcelExporter.export_calls_to_parquet(self.df, self.path('appels.parquet'), EXTENSIONS)
+        self.assertEqual(filename, self.path('appels.parquet'))
+        self.assertOnlyFiles('appels.parquet')
+
+        schema = pyarrow.parquet.read_schema(filename)
+        self.assertTrue(pyarrow.types.is_duration(schema.field('Durée').type))
+        exported = pd.read_parquet(filename)
+        self.assertEqual(len(exported), len(self.df))
+        self.assertEqual(exported['Durée'].dtype.kind, 'm')
+        self.assertEqual(exported['Durée'].dt.total_seconds().astype(int).tolist(), self.df['billsec'].tolist())
+
+    def test_empty_frame_writes_nothing(self):
+        self.assertEqual(ExcelExporter.export_calls_to_parquet(pd.DataFrame(), self.path('appels.parquet')), '')
+        self.assertOnlyFiles()
+
+
+class ParquetWithoutPyarrowTest(ExportTestCase):
+
+    def test_missing_pyarrow_writes_nothing(self):
+        # A None entry in sys.modules makes the import inside the export raise ImportError
+        with mock.patch.dict(sys.modules, {'pyarrow': None}):
+            self.assertEqual(ExcelExporter.export_calls_to_parquet(self.df, self.path('appels.parquet')), '')
+        self.assertOnlyFiles()
+
+
+class AppCallsExportTest(ExportTestCase):
+    def run_export(self, **config) -> dict:
+        config = dict(db_user='u', db_password='p', db_name='d', db_host='ipbx', db_port=3306,
+                      client_id='id', client_secret='secret', **config)
+        with mock.patch('call_analyzer.services.app.DatabaseConnector'):
+            app = CDRAnalyzerApp(config)
+        app.db_connector.execute_query.return_value = build_cdr_frame()
+        app.gql_connector.execute_gql_query = mock.Mock(return_value={
+            'fetchAllExtensions': {'status': True, 'extension': [
+                {'extensionId': number, 'user': {'name': EXTENSIONS.get(number)}}
+                for number in ('101', '102', '130', '163')]},
+            'fetchAllRingGroups': {'status': True, 'ringgroups': [{'groupNumber': 600, 'description': 'Support'}]},
+        })
+        with app:
+            _, files = app.run_analysis('2026-05-01', '2026-05-31', export=True, output_dir=self.tmp_path)
+        return files
+
+    def test_excel_max_rows_setting_splits_the_calls_file(self):
+        files = self.run_export(excel_max_rows=25)
+        n_files = -(-len(self.df) // 25)
+        self.assertEqual(files['calls'], [self.path(f'appels_20260501-20260531_{part}.xlsx')
+                                          for part in range(1, n_files + 1)])
+        self.assertOnlyFiles('stats_appels_20260501-20260531.xlsx',
+                             *(os.path.basename(file) for file in files['calls']))
+
+    def test_invalid_excel_max_rows_setting_is_rejected(self):
+        for max_rows in (0, 2_000_000):
+            with self.subTest(max_rows=max_rows), self.assertRaises(ValueError):
+                self.run_export(excel_max_rows=max_rows)
+
+    def test_default_setting_writes_a_single_calls_file(self):
+        files = self.run_export()
+        self.assertEqual(files['calls'], self.path('appels_20260501-20260531.xlsx'))
+
+    @skipUnless(pyarrow is not None, 'pyarrow is not installed')
+    def test_parquet_format_setting(self):
+        files = self.run_export(calls_export_format='parquet', excel_max_rows=25)
+        self.assertEqual(files['calls'], self.path('appels_20260501-20260531.parquet'))
+        self.assertEqual(len(pd.read_parquet(files['calls'])), len(self.df))
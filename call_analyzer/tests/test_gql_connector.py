@@ -0,0 +1,105 @@
+from unittest import TestCase, mock
+
+from call_analyzer.infrastructure import gql_connector
+from call_analyzer.infrastructure.gql_connector import GqlConnector
+
+RESULT = {'fetchAllExtensions': {'status': True, 'extension': []}}
+
+
+class GqlConnectorSessionTest(TestCase):
+    def setUp(self):
+        self.now = 1_000_000.0
+        self.tokens = iter(['tok-1', 'tok-2', 'tok-3'])
+        self.expires_in = 120
+
+        patches = {
+            'time': mock.patch.object(gql_connector.time, 'time', side_effect=lambda: self.now),
+            'post': mock.patch.object(gql_connector.requests, 'post', side_effect=self._token_response),
+            'transport': mock.patch.object(gql_connector, 'RequestsHTTPTransport'),
+            'client': mock.patch.object(gql_connector, 'Client', side_effect=self._client),
+        }
+        self.mocks = {name: patch.start() for name, patch in patches.items()}
+        for patch in patches.values():
+            self.addCleanup(patch.stop)
+        self.clients = []
+        self.connector = GqlConnector('ipbx.example', 'id', 'secret')
+
+    def _token_response(self, *args, **kwargs):
+        response = mock.Mock(status_code=200)
+        payload = {'token_type': 'Bearer', 'access_token': next(self.tokens)}
+        if self.expires_in is not None:
+            payload['expires_in'] = self.expires_in
+        response.json.return_value = payload
+        return response
+
+    def _client(self, *args, **kwargs):
+        client = mock.Mock()
+        client.connect_sync.return_value.execute.return_value = RESULT
+        self.clients.append(client)
+        return client
+
+    def authorizations(self):
+        return [call.kwargs['headers']['Authorization'] for call in self.mocks['transport'].call_args_list]
+
+    def test_session_and_token_are_reused_while_the_token_is_valid(self):
+        for _ in range(3):
+            self.assertEqual(self.connector.execute_gql_query('{ fetchAllExtensions { status } }'), RESULT)
+            self.now += 10
+        self.assertEqual(self.mocks['post'].call_count, 1)
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(self.clients[0].connect_sync.return_value.execute.call_count, 3)
+
+    def test_expired_token_is_refreshed_and_the_session_rebuilt(self):
+        self.connector.execute_gql_query('{ a }')
+        # Still inside expires_in, but within the renewal margin
+        self.now += self.expires_in - GqlConnector.TOKEN_EXPIRY_MARGIN + 1
+        self.connector.execute_gql_query('{ a }')
+
+        self.assertEqual(self.mocks['post'].call_count, 2)
+        self.assertEqual(self.authorizations(), ['Bearer tok-1', 'Bearer tok-2'])
+        self.assertEqual(len(self.clients), 2)
+        self.clients[0].close_sync.assert_called_once()
+        self.clients[1].close_sync.assert_not_called()
+
+    def test_close_drops_the_session_but_keeps_the_token(self):
+        self.connector.execute_gql_query('{ a }')
+        self.connector.close()
+        self.clients[0].close_sync.assert_called_once()
+        self.connector.close()
+        self.clients[0].close_sync.assert_called_once()
+
+        self.connector.execute_gql_query('{ a }')
+        self.assertEqual(self.mocks['post'].call_count, 1)
+        self.assertEqual(self.authorizations(), ['Bearer tok-1', 'Bearer tok-1'])
+
+    def test_failed_connection_closes_the_new_client(self):
+        self.mocks['client'].side_effect = None
+        failing = self.mocks['client'].return_value
+        failing.connect_sync.side_effect = ConnectionError('refused')
+        with self.assertRaises(ConnectionError):
+            self.connector.execute_gql_query('{ a }')
+        failing.close_sync.assert_called_once()
+        self.connector.close()
+        failing.close_sync.assert_called_once()
+
+        # The next query starts over with a fresh client
+        self.mocks['client'].side_effect = self._client
+        self.assertEqual(self.connector.execute_gql_query('{ a }'), RESULT)
+        self.assertEqual(len(self.clients), 1)
+
+    def test_missing_expires_in_uses_the_default_lifetime(self):
+        self.expires_in = None
+        self.connector.execute_gql_query('{ a }')
+        self.now += GqlConnector.DEFAULT_TOKEN_LIFETIME - GqlConnector.TOKEN_EXPIRY_MARGIN - 1
+        self.connector.execute_gql_query('{ a }')
+        self.assertEqual(self.mocks['post'].call_count, 1)
+        self.now += 2
+        self.connector.execute_gql_query('{ a }')
+        self.assertEqual(self.mocks['post'].call_count, 2)
+
+    def test_failed_query_status_raises(self):
+        self.connector.execute_gql_query('{ a }')
+        self.clients[0].connect_sync.return_value.execute.return_value = {
+            'fetchAllExtensions': {'status': False, 'message': 'denied'}}
+        with self.assertRaisesRegex(ValueError, 'denied'):
+            self.connector.execute_gql_query('{ a }')
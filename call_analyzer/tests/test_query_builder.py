@@ -0,0 +1,88 @@
+import re
+from unittest import TestCase
+
+from call_analyzer.infrastructure.query_builder import QueryBuilder
+
+
+class BuildFilterConditionTest(TestCase):
+    def assertNumbers(self, numeros, expected):
+        condition, params = QueryBuilder.build_filter_condition(numeros)
+        numbers = {name: value for name, value in params.items() if name.startswith('num_')}
+        self.assertEqual(sorted(numbers.values()), sorted(expected))
+        in_list = '(' + ', '.join(f':{name}' for name in numbers) + ')'
+        for column in ('src', 'dst', 'did', 'cnum'):
+            self.assertIn(f'{column} IN {in_list}', condition)
+        self.assertIn('channel REGEXP :channel_re', condition)
+        self.assertIn('dstchannel REGEXP :channel_re', condition)
+        # Numbers are bound, never interpolated into the SQL text
+        for number in expected:
+            self.assertNotIn(number, condition)
+        return condition, params
+
+    def test_international_prefix_gives_national_and_short_forms(self):
+        self.assertNumbers(['+33383369555'], ['383369555', '0383369555'])
+
+    def test_national_number_gives_short_form(self):
+        self.assertNumbers(['0383369555'], ['0383369555', '383369555'])
+
+    def test_plain_number_gives_zero_prefixed_form(self):
+        self.assertNumbers(['163'], ['163', '0163'])
+
+    def test_equivalent_numbers_are_bound_once(self):
+        _, params = self.assertNumbers(['+33383369555', '0383369555', '163'],
+                                       ['383369555', '0383369555', '163', '0163'])
+        self.assertEqual(params['channel_re'], 'PJSIP/(0163|0383369555|163|383369555)')
+
+    def test_empty_list_gives_no_condition(self):
+        self.assertEqual(QueryBuilder.build_filter_condition([]), ('', {}))
+
+    def test_callers_get_their_own_params(self):
+        _, params = QueryBuilder.build_filter_condition(['163'])
+        params['date_debut'] = '2025-01-01 00:00:00'
+        _, again = QueryBuilder.build_filter_condition(['163'])
+        self.assertNotIn('date_debut', again)
+
+    def test_channel_regexp_matches_like_the_former_like_scans(self):
+        _, params = QueryBuilder.build_filter_condition(['0383369555', '163'])
+        channel_re = re.compile(params['channel_re'])
+        numbers = [value for name, value in params.items() if name.startswith('num_')]
+        for channel in ('PJSIP/163-00000001', 'PJSIP/1630-00000002', 'PJSIP/101-00000003',
+                        'Local/163@from-internal-00000004;1', 'PJSIP/0383369555-00000005', 'SIP/163-00000006'):
+            with self.subTest(channel=channel):
+                # Former condition: channel LIKE '%PJSIP/<num>%' for each number
+                expected = any(f'PJSIP/{number}' in channel for number in numbers)
+                self.assertEqual(bool(channel_re.search(channel)), expected)
+
+
+class FormatDateTest(TestCase):
+    def test_supported_layouts(self):
+        for date_str, expected in (('2025-02-01 08:30:00', '2025-02-01 08:30:00'),
+                                   ('2025-02-01', '2025-02-01 00:00:00'),
+                                   ('01/02/2025 08:30:00', '2025-02-01 08:30:00'),
+                                   ('01/02/2025', '2025-02-01 00:00:00')):
+            with self.subTest(date_str=date_str):
+                self.assertEqual(QueryBuilder.format_date(date_str), expected)
+
+    def test_other_inputs_are_rejected(self):
+        for date_str in ('now', 'today', '2025', '01/13/2025', '2025-02-30', '2025/02/01',
+                         '1 février 2025', '2025-02-01T08:30:00', ''):
+            with self.subTest(date_str=date_str), self.assertRaises(ValueError):
+                QueryBuilder.format_date(date_str)
+
+
+class BuildCallQueryTest(TestCase):
+    def test_dates_are_bound_and_normalised(self):
+        query, params = QueryBuilder.build_call_query('01/02/2025', '2025-02-28 23:59:59')
+        self.assertEqual(params, {'date_debut': '2025-02-01 00:00:00', 'date_fin': '2025-02-28 23:59:59'})
+        self.assertIn('calldate BETWEEN :date_debut AND :date_fin', query)
+        self.assertNotIn('2025', query)
+        self.assertNotIn('REGEXP', query)
+
+    def test_numbers_filter_the_linkedid_subquery(self):
+        query, params = QueryBuilder.build_call_query('2025-02-01', '2025-02-28', ['+33383369555'])
+        self.assertEqual(params['num_0'], '0383369555')
+        self.assertEqual(params['num_1'], '383369555')
+        self.assertEqual(params['channel_re'], 'PJSIP/(0383369555|383369555)')
+        self.assertIn('src IN (:num_0, :num_1)', query)
+        self.assertIn('ORDER BY c.linkedid, c.sequence', query)
+        self.assertNotIn('383369555', query)
@@ -0,0 +1,169 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from call_analyzer.services.call_analyzer import CallAnalyzer
+from call_analyzer.services.statistics import StatisticsGenerator
+from call_analyzer.tests.test_call_grouping import build_cdr_frame
+
+
+def _mean_positive(billsec: pd.Series) -> float:
+    positive = billsec[billsec > 0]
+    return positive.mean() if len(positive) > 0 else 0
+
+
+def reference_statistics(df: pd.DataFrame, reference_numbers=None) -> dict:
+    """Mask-per-statistic reference for calculate_statistics."""
+    if not reference_numbers:
+        df = df[~df['is_internal']]
+    if df.empty:
+        return StatisticsGenerator.get_empty_statistics()
+
+    answered = df['answered']
+    entrant = df['type_appel'] == 'entrant'
+    sortant = df['type_appel'] == 'sortant'
+    internal = df['is_internal']
+    forward = df['renvoi_vers'].notna()
+    billsec = df['billsec']
+
+    def mean(mask):
+        values = billsec[mask & answered]
+        return int(values.mean()) if len(values) > 0 else 0
+
+    return {
+        'nb_appels_total': len(df),
+        'nb_appels_recus': int(entrant.sum()),
+        'nb_appels_emis': int(sortant.sum()),
+        'nb_appels_internes': int(internal.sum()),
+        'nb_appel_interne_emis': int((sortant & internal).sum()),
+        'nb_appel_interne_recus': int((entrant & internal).sum()),
+        'nb_appels_manques': int((entrant & ~answered).sum()),
+        'nb_appels_externes_manques': int((entrant & ~answered & ~internal).sum()),
+        'nb_appels_internes_manques': int((entrant & ~answered & internal).sum()),
+        'nb_appels_internes_repondus': int((entrant & answered & internal).sum()),
+        'nb_appels_aboutis': int((sortant & answered).sum()),
+        'nb_appels_externes_aboutis': int((sortant & answered & ~internal).sum()),
+        'nb_appels_internes_aboutis': int((sortant & answered & internal).sum()),
+        'duree_appels_total': int(billsec.sum()),
+        'duree_appels_recus': int(billsec[entrant].sum()),
+        'duree_appels_internes_recus': int(billsec[entrant & internal].sum()),
+        'duree_appels_externes_recus': int(billsec[entrant & ~internal].sum()),
+        'duree_appels_emis': int(billsec[sortant].sum()),
+        'duree_appels_internes_emis': int(billsec[sortant & internal].sum()),
+        'duree_appels_externes_emis': int(billsec[sortant & ~internal].sum()),
+        'duree_moyenne_appels': int(billsec[answered].mean()) if answered.any() else 0,
+        'duree_moyenne_appels_internes': mean(internal),
+        'duree_moyenne_appels_externes': mean(~internal),
+        'nb_renvois_appels_recus': int((entrant & forward).sum()),
+        'duree_renvois_appels_recus': int(billsec[entrant & forward].sum()),
+        'nb_renvois_appels_emis': int((sortant & forward).sum()),
+        'duree_renvois_appels_emis': int(billsec[sortant & forward].sum()),
+        'nb_click_to_call': int(df['is_click_to_call'].sum()),
+    }
+
+
+def reference_grouped(df: pd.DataFrame, key: pd.Series, key_name: str, with_directions: bool = False) -> pd.DataFrame:
+    """groupby reference for the hourly and daily statistics."""
+    aggregations = {'nb_appels': ('uniqueid', 'count')}
+    if with_directions:
+        aggregations['nb_appels_recus'] = ('type_appel', lambda x: (x == 'entrant').sum())
+        aggregations['nb_appels_emis'] = ('type_appel', lambda x: (x == 'sortant').sum())
+    aggregations['nb_appels_repondus'] = ('answered', 'sum')
+    aggregations['duree_totale'] = ('billsec', 'sum')
+    aggregations['duree_moyenne'] = ('billsec', _mean_positive)
+    grouped = df.groupby(key).agg(**aggregations).reset_index().rename(columns={key.name: key_name})
+    grouped['duree_moyenne'] = grouped['duree_moyenne'].round(0).astype(int)
+    return grouped
+
+
+def reference_top(df: pd.DataFrame, call_type: str, column: str, top_n: int = 10) -> pd.DataFrame:
+    calls = df[df['type_appel'] == call_type]
+    if calls.empty:
+        return pd.DataFrame()
+    top = calls.groupby(column).agg(
+        nb_appels=('uniqueid', 'count'),
+        nb_repondus=('answered', 'sum'),
+        duree_totale=('billsec', 'sum'),
+        duree_moyenne=('billsec', _mean_positive),
+    ).reset_index()
+    top['duree_moyenne'] = top['duree_moyenne'].round(0).astype(int)
+    top['taux_reponse'] = (top['nb_repondus'] / top['nb_appels'] * 100).round(1)
+    # Stable sort: tied counts keep the group key order
+    return top.sort_values('nb_appels', ascending=False, kind='stable').head(top_n)
+
+
+def random_calls(n: int, seed: int, categorical: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    call_types = rng.choice(['entrant', 'sortant', 'interne'], n)
+    return pd.DataFrame({
+        'call_date': pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.integers(0, 40 * 86400, n), unit='s'),
+        'uniqueid': [f'call-{i}' for i in range(n)],
+        'src': rng.choice([str(i) for i in range(30)], n),
+        'dst': rng.choice([str(i) for i in range(30)], n),
+        'billsec': rng.integers(0, 600, n) * (rng.random(n) < 0.7),
+        'answered': rng.random(n) < 0.6,
+        'type_appel': pd.Categorical(call_types) if categorical else call_types,
+        'is_internal': rng.random(n) < 0.3,
+        'renvoi_vers': np.where(rng.random(n) < 0.2, '0612345678', None),
+        'is_click_to_call': rng.random(n) < 0.1,
+    })
+
+
+class StatisticsEquivalenceTest(TestCase):
+    def frames(self):
+        analyzer = CallAnalyzer(
+            internal_numbers={'101', '102', '130', '163', '600'},
+            ring_group_numbers={'600'},
+            extension_numbers={'101', '102', '130', '163'},
+        )
+        yield 'analysed', analyzer.analyze_dataframe(build_cdr_frame())
+        yield 'object type_appel', random_calls(2000, seed=1, categorical=False)
+        yield 'categorical type_appel', random_calls(2000, seed=2, categorical=True)
+        yield 'single call', random_calls(1, seed=3, categorical=False)
+
+    def test_calculate_statistics_matches_reference(self):
+        for name, df in self.frames():
+            for reference_numbers in (None, ['163']):
+                with self.subTest(frame=name, reference_numbers=reference_numbers):
+                    result = StatisticsGenerator.calculate_statistics(df, reference_numbers)
+                    expected = reference_statistics(df, reference_numbers)
+                    self.assertEqual(result, expected)
+                    self.assertTrue(all(type(value) is int for value in result.values()))
+
+    def test_only_internal_calls_without_reference_give_empty_statistics(self):
+        df = random_calls(50, seed=4, categorical=True).assign(is_internal=True)
+        self.assertEqual(StatisticsGenerator.calculate_statistics(df), StatisticsGenerator.get_empty_statistics())
+
+    def test_hourly_statistics_match_groupby(self):
+        for name, df in self.frames():
+            with self.subTest(frame=name):
+                pd.testing.assert_frame_equal(
+                    StatisticsGenerator.calculate_hourly_statistics(df),
+                    reference_grouped(df, df['call_date'].dt.hour, 'hour'),
+                )
+
+    def test_daily_statistics_match_groupby(self):
+        for name, df in self.frames():
+            with self.subTest(frame=name):
+                pd.testing.assert_frame_equal(
+                    StatisticsGenerator.calculate_daily_statistics(df),
+                    reference_grouped(df, df['call_date'].dt.date, 'date', with_directions=True),
+                )
+
+    def test_daily_statistics_use_the_local_day_of_aware_dates(self):
+        df = random_calls(500, seed=5, categorical=True)
+        df['call_date'] = df['call_date'].dt.tz_localize('UTC').dt.tz_convert('Europe/Paris')
+        pd.testing.assert_frame_equal(
+            StatisticsGenerator.calculate_daily_statistics(df),
+            reference_grouped(df, df['call_date'].dt.date, 'date', with_directions=True),
+        )
+
+    def test_top_numbers_match_groupby(self):
+        for name, df in self.frames():
+            for top_n in (3, 10):
+                with self.subTest(frame=name, top_n=top_n):
+                    pd.testing.assert_frame_equal(StatisticsGenerator.top_sources(df, top_n),
+                                                  reference_top(df, 'entrant', 'src', top_n))
+                    pd.testing.assert_frame_equal(StatisticsGenerator.top_destinations(df, top_n),
+                                                  reference_top(df, 'sortant', 'dst', top_n))